@@ -2,34 +2,1623 @@ import tkinter as tk
 from tkinter import ttk
 import json
 from datetime import datetime, timedelta
+from collections import Counter, deque, OrderedDict
 import os
 import sys
-from PIL import Image, ImageTk  # Add PIL for better image handling
+import time
+import math
+import socket
+import argparse
+import heapq
+import queue
+import threading
+import itertools
+import tracemalloc
+import tempfile
+import ctypes
+import ctypes.util
+import struct
+import hashlib
+import uuid
+import gzip
+import zlib
+import bisect
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageTk  # Add PIL for better image handling
 from tkcalendar import DateEntry  # For date/time picker
 
 print("Starting Crystal Lizard Desktop Pet...")
 
+REMINDER_TIME_FORMAT = "%Y-%m-%d %H:%M"
+DEFAULT_PET = "default"
+
+
+def build_arg_parser():
+    """Command-line options, shared by a fresh launch and the forwarding client"""
+    parser = argparse.ArgumentParser(description="Crystal Lizard Desktop Pet")
+    parser.add_argument(
+        "--pet",
+        metavar="NAME",
+        action="append",
+        help="Pet the command applies to; starts it if not running (repeatable)"
+    )
+    parser.add_argument(
+        "--add-reminder",
+        metavar="TEXT",
+        help="Add a reminder to the running pet"
+    )
+    parser.add_argument(
+        "--due",
+        metavar="'YYYY-MM-DD HH:MM'",
+        help="Due time for --add-reminder (default: now)"
+    )
+    parser.add_argument(
+        "--start-pomodoro",
+        action="store_true",
+        help="Start a Pomodoro session"
+    )
+    parser.add_argument(
+        "--show",
+        action="store_true",
+        help="Wake the pet and bring it to the front"
+    )
+    parser.add_argument(
+        "--display-locked",
+        action="store_true",
+        help="Tell the pet the session is locked so it enters idle mode"
+    )
+    parser.add_argument(
+        "--display-unlocked",
+        action="store_true",
+        help="Tell the pet the session is unlocked again"
+    )
+    parser.add_argument(
+        "--wakeups",
+        action="store_true",
+        help="Report timer wakeups during the last minute"
+    )
+    parser.add_argument(
+        "--theme",
+        metavar="NAME",
+        help="Recolor the pet with a built-in theme, or 'none' for the original colors"
+    )
+    parser.add_argument(
+        "--pomodoro-theme",
+        metavar="STATE=NAME",
+        action="append",
+        help="Theme to use during a Pomodoro state (work, break, long_break); repeatable"
+    )
+    parser.add_argument(
+        "--history",
+        metavar="DAYS",
+        type=int,
+        nargs="?",
+        const=7,
+        help="List reminders dismissed or deleted during the last DAYS days (default 7)"
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="TRACE",
+        help="Replay a JSON event trace (or 'day' for a scripted workday) on a "
+             "virtual clock, print the final state and throughput, and exit"
+    )
+    parser.add_argument(
+        "--soak",
+        metavar="CYCLES",
+        type=int,
+        help="Run a hidden pet through CYCLES simulated usage cycles and fail "
+             "if memory, Tk widgets or images keep growing"
+    )
+    parser.add_argument(
+        "--import-reminders",
+        action="store_true",
+        help="Read reminders from stdin, one 'YYYY-MM-DD HH:MM text' per line or a JSON list"
+    )
+    return parser
+
+
+def new_reminder_id():
+    return uuid.uuid4().hex[:16]
+
+
+def content_reminder_id(reminder, occurrence=0):
+    """Stable ID for a reminder written without one, e.g. by an external script.
+
+    Identical reminders in one file are told apart by occurrence, their
+    count among the identical ones before them.
+    """
+    key = f"{reminder.get('text')}\0{reminder.get('due_datetime')}\0{reminder.get('created_at')}"
+    if occurrence:
+        key += f"\0{occurrence}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_reminder_lines(text, now=None):
+    """Parse bulk-imported reminders from a JSON list or 'YYYY-MM-DD HH:MM text' lines"""
+    now = now or datetime.now()
+    if text.lstrip().startswith(("[", "{")):
+        items = json.loads(text)
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON list of reminders")
+        entries = []
+        for item in items:
+            if not (isinstance(item, dict)
+                    and isinstance(item.get("due_datetime"), str)
+                    and isinstance(item.get("text"), str)):
+                raise ValueError(f"Expected a reminder with due_datetime and text, got {item!r}")
+            entries.append((item["due_datetime"], item["text"]))
+    else:
+        entries = []
+        for line in text.splitlines():
+            parts = line.strip().split(None, 2)
+            if len(parts) == 3:
+                entries.append((f"{parts[0]} {parts[1]}", parts[2]))
+            elif line.strip():
+                print(f"Skipping malformed reminder line: {line!r}")
+
+    reminders = []
+    for due, reminder_text in entries:
+        # Normalise the timestamp and reject anything unparseable
+        due = datetime.strptime(due, REMINDER_TIME_FORMAT).strftime(REMINDER_TIME_FORMAT)
+        reminders.append({
+            "id": new_reminder_id(),
+            "text": reminder_text,
+            "due_datetime": due,
+            "created_at": now.strftime(REMINDER_TIME_FORMAT)
+        })
+    return reminders
+
+
+class InstanceChannel:
+    """Local socket owned by the running pet.
+
+    A second launch connects, forwards its command-line arguments and exits.
+    A Unix domain socket is used where available; elsewhere a loopback TCP
+    port is published in PORT_FILE. A socket nobody answers on is stale and
+    gets replaced. The endpoint files live in directory, the working
+    directory by default.
+    """
+    SOCKET_FILE = "deskpet.sock"
+    PORT_FILE = "deskpet.port"
+    CONNECT_TIMEOUT = 0.5  # seconds
+    REPLY_TIMEOUT = 30  # seconds; the command may have to start a new pet
+
+    def __init__(self, directory=""):
+        self.directory = directory
+        self._server = None
+        self._root = None
+        self._scheduler = None
+        self._handler = None
+        self._requests = queue.Queue()  # (connection, request) read by the accept thread
+
+    @classmethod
+    def _connect(cls, directory=""):
+        """Connect to a running instance, or return None if there is none"""
+        try:
+            if hasattr(socket, "AF_UNIX"):
+                client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                address = os.path.join(directory, cls.SOCKET_FILE)
+            else:
+                with open(os.path.join(directory, cls.PORT_FILE), "r") as f:
+                    port = int(f.read().strip())
+                client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                address = ("127.0.0.1", port)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        client.settimeout(cls.CONNECT_TIMEOUT)
+        try:
+            client.connect(address)
+            return client
+        except OSError:
+            client.close()
+            return None
+
+    @classmethod
+    def forward(cls, argv, stdin_text="", directory=""):
+        """Send arguments to the running instance. Returns False if none is running.
+
+        Raises OSError if the instance accepted the connection but then
+        failed to reply; it may still have run the command.
+        """
+        client = cls._connect(directory)
+        if client is None:
+            return False
+        try:
+            client.settimeout(cls.REPLY_TIMEOUT)
+            message = json.dumps({"argv": argv, "stdin": stdin_text}) + "\n"
+            client.sendall(message.encode("utf-8"))
+            client.shutdown(socket.SHUT_WR)
+            reply = client.makefile("r", encoding="utf-8").read().strip()
+            if reply:
+                print(reply)
+            return True
+        finally:
+            client.close()
+
+    def _endpoint_files(self):
+        return [os.path.join(self.directory, name) for name in (self.SOCKET_FILE, self.PORT_FILE)]
+
+    def _remove_stale_endpoint(self):
+        """Remove a socket or port file left behind by an instance that died"""
+        client = self._connect(self.directory)
+        if client is not None:
+            client.close()
+            raise RuntimeError("Another instance is already running")
+        for path in self._endpoint_files():
+            if os.path.exists(path):
+                print(f"Removing stale {path}")
+                os.remove(path)
+
+    def listen(self, root, scheduler, handler):
+        """Own the channel and dispatch incoming commands through the Tk loop"""
+        self._remove_stale_endpoint()
+        socket_file, port_file = self._endpoint_files()
+        if hasattr(socket, "AF_UNIX"):
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(socket_file)
+        else:
+            self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._server.bind(("127.0.0.1", 0))
+            with open(port_file, "w") as f:
+                f.write(str(self._server.getsockname()[1]))
+        self._server.listen(5)
+        self._root = root
+        self._scheduler = scheduler
+        self._handler = handler
+
+        try:
+            # Wake only when a client connects
+            root.tk.createfilehandler(self._server, tk.READABLE, self._on_readable)
+        except (AttributeError, tk.TclError):
+            # Tk file handlers don't exist on Windows; block in a thread instead
+            threading.Thread(target=self._accept_loop, args=(self._server,), daemon=True).start()
+
+    @classmethod
+    def _read_request(cls, conn):
+        conn.settimeout(cls.CONNECT_TIMEOUT)
+        request = json.loads(conn.makefile("r", encoding="utf-8").read())
+        if not isinstance(request, dict):
+            raise ValueError("Expected a JSON object")
+        return request
+
+    def _on_readable(self, *args):
+        try:
+            conn, _ = self._server.accept()
+        except OSError:
+            return
+        try:
+            request = self._read_request(conn)
+        except (OSError, ValueError) as e:
+            print(f"Error reading forwarded command: {e}")
+            conn.close()
+            return
+        self._handle(conn, request)
+
+    def _accept_loop(self, server):
+        """Accept and read requests off the Tk thread; wake Tk once per request"""
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return  # Closed by close()
+            try:
+                request = self._read_request(conn)
+            except (OSError, ValueError) as e:
+                print(f"Error reading forwarded command: {e}")
+                conn.close()
+                continue
+            self._requests.put((conn, request))
+            while True:
+                try:
+                    # Tk runs after() calls from other threads in its own thread
+                    self._scheduler.schedule(0, self._handle_queued)
+                    break
+                except RuntimeError:
+                    time.sleep(0.1)  # The main loop hasn't started yet
+
+    def _handle_queued(self):
+        while True:
+            try:
+                conn, request = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            self._handle(conn, request)
+
+    def _handle(self, conn, request):
+        try:
+            reply = self._handler(request.get("argv", []), request.get("stdin", ""))
+            conn.sendall(f"{reply}\n".encode("utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Error handling forwarded command: {e}")
+        finally:
+            conn.close()
+
+    def close(self):
+        """Stop listening and remove the endpoint file"""
+        if self._server is None:
+            return
+        try:
+            self._root.tk.deletefilehandler(self._server)
+        except (AttributeError, tk.TclError):
+            pass
+        self._server.close()
+        self._server = None
+        for path in self._endpoint_files():
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class HitMask:
+    """One bit per pixel of a sprite: set where the pixel is opaque enough to click"""
+    ALPHA_THRESHOLD = 32
+
+    def __init__(self, image):
+        alpha = image.convert("RGBA").getchannel("A")
+        bits = alpha.point(
+            lambda a: 255 if a >= self.ALPHA_THRESHOLD else 0
+        ).convert("1", dither=Image.Dither.NONE)
+        self.width, self.height = bits.size
+        # Mode "1" packs rows MSB-first, each padded to a whole byte
+        self._stride = (self.width + 7) // 8
+        self._bits = bits.tobytes()
+
+    def hit(self, x, y):
+        """True if (x, y) falls on an opaque pixel"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        return bool(self._bits[y * self._stride + (x >> 3)] & (0x80 >> (x & 7)))
+
+
+class BubbleRenderer:
+    """Renders a speech bubble and its text into one image.
+
+    The bubble is 9-sliced so it grows to fit the text; rendered bubbles
+    are kept in a small LRU keyed by text and width.
+    """
+    SOURCE_INSETS = (80, 50, 50, 100)  # left, top, right, bottom borders of the bubble art
+    SCALE = 0.4  # output pixels per source pixel for the borders
+    PADDING = (20, 16, 22, 34)  # text margins inside the bubble, in output pixels
+    MIN_SIZE = (120, 70)
+    FONT_SIZE = 16
+    TEXT_COLOR = "black"
+    CACHE_SIZE = 32
+
+    def __init__(self, bubble_image):
+        bubble_image = bubble_image.convert("RGBA")
+        self._source = bubble_image.crop(bubble_image.getchannel("A").getbbox())
+        self._font = self._load_font()
+        self._measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        self._cache = OrderedDict()
+
+    def _load_font(self):
+        for name in ("arialbd.ttf", "DejaVuSans-Bold.ttf"):
+            try:
+                return ImageFont.truetype(name, self.FONT_SIZE)
+            except OSError:
+                continue
+        return ImageFont.load_default()
+
+    def render(self, text, max_width=220):
+        """Return a PhotoImage of the bubble with text, reusing cached renders"""
+        key = (text, max_width)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        image = ImageTk.PhotoImage(self.render_image(text, max_width))
+        self._cache[key] = image
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return image
+
+    def render_image(self, text, max_width=220):
+        """Compose the bubble and text as a Pillow image"""
+        pad_left, pad_top, pad_right, pad_bottom = self.PADDING
+        lines = self._wrap(text, max_width - pad_left - pad_right)
+        ascent, descent = self._font.getmetrics()
+        line_height = ascent + descent + 2
+        text_width = max((self._measure.textlength(line, font=self._font) for line in lines), default=0)
+
+        width = max(self.MIN_SIZE[0], int(text_width) + pad_left + pad_right)
+        height = max(self.MIN_SIZE[1], line_height * len(lines) + pad_top + pad_bottom)
+        image = self._nine_slice(width, height)
+
+        # Center the text block in the area above the tail
+        draw = ImageDraw.Draw(image)
+        area_height = height - pad_top - pad_bottom
+        y = pad_top + (area_height - line_height * len(lines)) // 2
+        for line in lines:
+            line_width = self._measure.textlength(line, font=self._font)
+            x = pad_left + (width - pad_left - pad_right - line_width) / 2
+            draw.text((x, y), line, font=self._font, fill=self.TEXT_COLOR)
+            y += line_height
+        return image
+
+    def _wrap(self, text, width):
+        """Greedy word wrap by rendered width; overlong words are split"""
+        lines = []
+        for paragraph in text.splitlines() or [""]:
+            line = ""
+            for word in paragraph.split():
+                candidate = f"{line} {word}" if line else word
+                if self._measure.textlength(candidate, font=self._font) <= width:
+                    line = candidate
+                    continue
+                if line:
+                    lines.append(line)
+                line = word
+                while self._measure.textlength(line, font=self._font) > width and len(line) > 1:
+                    cut = len(line) - 1
+                    while cut > 1 and self._measure.textlength(line[:cut], font=self._font) > width:
+                        cut -= 1
+                    lines.append(line[:cut])
+                    line = line[cut:]
+            lines.append(line)
+        return lines
+
+    def _nine_slice(self, width, height):
+        """Stretch the bubble art to width x height, keeping its borders unscaled"""
+        src = self._source
+        sw, sh = src.size
+        sl, st, sr, sb = self.SOURCE_INSETS
+        # Border sizes in the output, shrunk if the bubble is tiny
+        dl, dt, dr, db = (int(v * self.SCALE) for v in self.SOURCE_INSETS)
+        dl, dr = min(dl, width // 2), min(dr, width // 2)
+        dt, db = min(dt, height // 2), min(db, height // 2)
+
+        src_x = (0, sl, sw - sr, sw)
+        src_y = (0, st, sh - sb, sh)
+        dst_x = (0, dl, width - dr, width)
+        dst_y = (0, dt, height - db, height)
+
+        image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        for row in range(3):
+            for col in range(3):
+                box = (src_x[col], src_y[row], src_x[col + 1], src_y[row + 1])
+                size = (dst_x[col + 1] - dst_x[col], dst_y[row + 1] - dst_y[row])
+                if size[0] <= 0 or size[1] <= 0:
+                    continue
+                patch = src.crop(box).resize(size, Image.Resampling.BICUBIC)
+                image.paste(patch, (dst_x[col], dst_y[row]))
+        return image
+
+
+# Built-in sprite themes. "hue" rotates hues by degrees and "saturation"
+# scales saturation (the lizard's crystals are blue, its body grey);
+# "palette" maps brightness onto a gradient through the colors, dark to light.
+THEMES = {
+    "amber": {"hue": 180},
+    "emerald": {"hue": -90},
+    "rose": {"hue": 120, "saturation": 1.2},
+    "autumn": {"palette": ["#2b1406", "#8a3b12", "#d9822b", "#f6d58e"]},
+    "frost": {"palette": ["#0d1b2a", "#415a77", "#a9c6e8", "#f0f8ff"]},
+    "mono": {"saturation": 0.0},
+}
+
+
+def _rgb_to_hsv(rgb):
+    """Vectorized RGB -> HSV for float arrays in [0, 1] with a trailing axis of 3"""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    value = rgb.max(axis=-1)
+    delta = value - rgb.min(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        saturation = np.where(value > 0, delta / value, 0.0)
+        rc, gc, bc = [(value - c) / delta for c in (r, g, b)]
+        hue = np.where(r == value, bc - gc, np.where(g == value, 2.0 + rc - bc, 4.0 + gc - rc))
+    hue = np.where(delta > 0, (hue / 6.0) % 1.0, 0.0)
+    return hue, saturation, value
+
+
+def _hsv_to_rgb(hue, saturation, value):
+    sector = np.floor(hue * 6.0)
+    f = hue * 6.0 - sector
+    p = value * (1 - saturation)
+    q = value * (1 - saturation * f)
+    t = value * (1 - saturation * (1 - f))
+    sector = sector.astype(np.int64)[..., None] % 6
+    return np.select(
+        [sector == i for i in range(6)],
+        [np.stack(channels, axis=-1) for channels in (
+            (value, t, p), (q, value, p), (p, value, t),
+            (p, q, value), (t, p, value), (value, p, q)
+        )]
+    )
+
+
+def recolor_sprite(image, theme):
+    """Recolor an RGBA sprite as described by a THEMES entry; alpha is kept as is"""
+    pixels = np.asarray(image.convert("RGBA"))
+    rgb = pixels[..., :3].astype(np.float32) / 255
+
+    if "palette" in theme:
+        stops = np.array(
+            [[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in theme["palette"]],
+            dtype=np.float32
+        ) / 255
+        brightness = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        positions = np.linspace(0.0, 1.0, len(stops))
+        rgb = np.stack(
+            [np.interp(brightness, positions, stops[:, channel]) for channel in range(3)],
+            axis=-1
+        )
+
+    if "hue" in theme or "saturation" in theme:
+        hue, saturation, value = _rgb_to_hsv(rgb)
+        hue = (hue + theme.get("hue", 0) / 360.0) % 1.0
+        saturation = np.clip(saturation * theme.get("saturation", 1.0), 0.0, 1.0)
+        rgb = _hsv_to_rgb(hue, saturation, value)
+
+    recolored = np.empty_like(pixels)
+    recolored[..., :3] = np.clip(rgb * 255 + 0.5, 0, 255).astype(np.uint8)
+    recolored[..., 3] = pixels[..., 3]
+    return Image.fromarray(recolored, "RGBA")
+
+
+class AnimatedSprite:
+    """A multi-frame APNG or GIF sprite whose frames are decoded on demand.
+
+    The file stays open and frames are read with seek() when first shown.
+    Resized frames go into the SpriteCache frame LRU, so only recently
+    played frames stay resident.
+    """
+    DEFAULT_FRAME_DURATION = 100  # milliseconds, for frames without one
+
+    def __init__(self, cache, key, image):
+        self.cache = cache
+        self.key = key  # (filename, size, flipped, theme)
+        self._image = image
+        self.frame_count = image.n_frames
+        self._durations = [None] * self.frame_count
+        self._record_duration(0)
+
+    def _record_duration(self, index):
+        # APNG durations are floats, and Tk timers take whole milliseconds
+        duration = self._image.info.get("duration")
+        self._durations[index] = round(duration) if duration else self.DEFAULT_FRAME_DURATION
+
+    def frame(self, index):
+        """Return (PhotoImage, HitMask, duration in ms) for a frame"""
+        return self.cache.frame(self, index)
+
+    def _decode_frame(self, index):
+        _, size, flipped, theme = self.key
+        self._image.seek(index)
+        self._record_duration(index)
+        image = self._image.convert("RGBA").resize(size, Image.Resampling.BICUBIC)
+        if flipped:
+            image = image.transpose(Image.FLIP_LEFT_RIGHT)
+        if theme:
+            image = recolor_sprite(image, THEMES[theme])
+        return image
+
+    def duration(self, index):
+        return self._durations[index] or self.DEFAULT_FRAME_DURATION
+
+
+class SpriteCache:
+    """Decoded and resized sprites, shared by every pet in the process.
+
+    Sprites are keyed by (filename, size, flipped, theme); a themed sprite
+    is recolored from the plain one once, so switching themes back and
+    forth only costs cache lookups. Animated sprites keep their first
+    frame here like any other sprite; the rest live in a frame LRU
+    bounded by FRAME_CACHE_BYTES.
+    """
+    TRANSITION_STEPS = 4  # intermediate frames in a cross-fade
+    FRAME_CACHE_BYTES = 16 * 1024 * 1024  # resident animation frames, all pets
+    EXTENSIONS = (".apng", ".gif", ".png")  # tried in order, so animations override stills
+
+    def __init__(self):
+        self._decoded = {}  # key -> resized RGBA Pillow image
+        self._sprites = {}  # key -> (PhotoImage, HitMask)
+        self._transitions = {}  # (from key, to key) -> [PhotoImage, ...]
+        self._animations = {}  # key -> AnimatedSprite, or None if single-frame
+        self._frames = OrderedDict()  # key + (frame,) -> (PhotoImage, HitMask, bytes)
+        self._frame_bytes = 0
+        self._bubble_renderer = None
+
+    @classmethod
+    def find(cls, base):
+        """File name for a sprite, whichever supported format exists"""
+        for extension in cls.EXTENSIONS:
+            if os.path.exists(base + extension):
+                return base + extension
+        return base + ".png"
+
+    def _decode(self, key):
+        if key not in self._decoded:
+            filename, size, flipped, theme = key
+            if theme:
+                image = recolor_sprite(self._decode((filename, size, flipped, None)), THEMES[theme])
+            else:
+                image = Image.open(filename).convert("RGBA").resize(size, Image.Resampling.BICUBIC)
+                if flipped:
+                    image = image.transpose(Image.FLIP_LEFT_RIGHT)
+            self._decoded[key] = image
+        return self._decoded[key]
+
+    def get(self, filename, size=(200, 200), flipped=False, theme=None):
+        """Return (PhotoImage, HitMask) for a sprite, decoding it on first use"""
+        key = (filename, size, flipped, theme)
+        if key not in self._sprites:
+            image = self._decode(key)
+            self._sprites[key] = (ImageTk.PhotoImage(image), HitMask(image))
+        return self._sprites[key]
+
+    def transition(self, from_key, to_key):
+        """Cross-fade frames between two sprites, blended once and then reused"""
+        key = (from_key, to_key)
+        if key not in self._transitions:
+            start, end = self._decode(from_key), self._decode(to_key)
+            steps = self.TRANSITION_STEPS
+            self._transitions[key] = [
+                ImageTk.PhotoImage(Image.blend(start, end, i / (steps + 1)))
+                for i in range(1, steps + 1)
+            ]
+        return self._transitions[key]
+
+    def animation(self, filename, size=(200, 200), flipped=False, theme=None):
+        """Return an AnimatedSprite for a multi-frame file, or None"""
+        key = (filename, size, flipped, theme)
+        if key not in self._animations:
+            image = Image.open(filename)
+            if getattr(image, "is_animated", False):
+                self._animations[key] = AnimatedSprite(self, key, image)
+            else:
+                image.close()
+                self._animations[key] = None
+        return self._animations[key]
+
+    def frame(self, animation, index):
+        """Return (PhotoImage, HitMask, duration) for one animation frame"""
+        if index == 0:
+            # The first frame is the sprite itself and is never evicted
+            photo, mask = self.get(*animation.key)
+            return photo, mask, animation.duration(0)
+        key = animation.key + (index,)
+        if key in self._frames:
+            self._frames.move_to_end(key)
+            photo, mask, _ = self._frames[key]
+            return photo, mask, animation.duration(index)
+
+        image = animation._decode_frame(index)
+        mask = HitMask(image)
+        # Tk keeps four bytes per pixel for a photo image
+        cost = image.width * image.height * 4 + len(mask._bits)
+        self._frames[key] = (ImageTk.PhotoImage(image), mask, cost)
+        self._frame_bytes += cost
+        while self._frame_bytes > self.FRAME_CACHE_BYTES and len(self._frames) > 1:
+            _, (_, _, evicted) = self._frames.popitem(last=False)
+            self._frame_bytes -= evicted
+        photo, mask, _ = self._frames[key]
+        return photo, mask, animation.duration(index)
+
+    def bubble_renderer(self):
+        if self._bubble_renderer is None:
+            self._bubble_renderer = BubbleRenderer(Image.open("speechbubble.png"))
+        return self._bubble_renderer
+
+
+class WidgetMirror:
+    """Proxy over a Tk widget that remembers the options, geometry and
+    visibility it last applied, and drops calls that would change nothing.
+
+    Anything it doesn't mirror is passed straight to the widget. Every
+    mirrored call is counted in `counts` as "issued" or "suppressed".
+    """
+
+    def __init__(self, widget, counts):
+        self.widget = widget
+        self._counts = counts
+        self._options = {}  # (canvas item or None, option) -> last applied value
+        self._geometry = None
+        self._visible = None  # unknown until the first deiconify or withdraw
+
+    def __getattr__(self, name):
+        return getattr(self.widget, name)
+
+    def _changed(self, item, options):
+        """The subset of options that differ from what was applied last"""
+        changed = {
+            name: value for name, value in options.items()
+            if (item, name) not in self._options or self._options[(item, name)] != value
+        }
+        self._counts["issued" if changed else "suppressed"] += 1
+        for name, value in changed.items():
+            self._options[(item, name)] = value
+        return changed
+
+    def configure(self, **options):
+        changed = self._changed(None, options)
+        if changed:
+            self.widget.configure(**changed)
+
+    config = configure
+
+    def itemconfigure(self, item, **options):
+        changed = self._changed(item, options)
+        if changed:
+            self.widget.itemconfigure(item, **changed)
+
+    def geometry(self, spec=None):
+        if spec is None:
+            return self.widget.geometry()
+        if spec == self._geometry:
+            self._counts["suppressed"] += 1
+            return
+        self._counts["issued"] += 1
+        self._geometry = spec
+        self.widget.geometry(spec)
+
+    def _set_visible(self, visible):
+        if visible == self._visible:
+            self._counts["suppressed"] += 1
+            return
+        self._counts["issued"] += 1
+        self._visible = visible
+        if visible:
+            self.widget.deiconify()
+        else:
+            self.widget.withdraw()
+
+    def deiconify(self):
+        self._set_visible(True)
+
+    def withdraw(self):
+        self._set_visible(False)
+
+
+class SpriteCompositor:
+    """Draws the pet on a Canvas as stacked layers.
+
+    The body sits at the bottom, an accessory layer above it and overlays
+    (the sleep Zzz and the Pomodoro ring) on top. A body change can replay
+    cross-fade frames from the SpriteCache instead of cutting hard, and an
+    animated body keeps playing its frames until paused or replaced.
+    """
+    TRANSITION_FRAME_DELAY = 30  # milliseconds between cross-fade frames
+    RING_BOX = (8, 8, 44, 44)  # Pomodoro ring, top-left of the pet
+    RING_COLORS = {"work": "#d9534f", "break": "#5cb85c", "long_break": "#5bc0de"}
+
+    def __init__(self, parent, size, scheduler, tcl_calls):
+        width, height = size
+        self.scheduler = scheduler
+        self.canvas = tk.Canvas(
+            parent,
+            width=width,
+            height=height,
+            bg='SystemButtonFace',
+            highlightthickness=0,
+            borderwidth=0
+        )
+        center = (width // 2, height // 2)
+        # Creation order is stacking order
+        self._body = self.canvas.create_image(*center)
+        self._text = self.canvas.create_text(*center, font=("Arial", 40), state="hidden")
+        self._accessory = self.canvas.create_image(*center, state="hidden")
+        self._zzz = self.canvas.create_text(
+            width - 35, 25,
+            text="Zzz",
+            font=('Arial', 18, 'bold'),
+            fill='#3b4f8c',
+            state="hidden"
+        )
+        self._ring = self.canvas.create_arc(
+            *self.RING_BOX,
+            start=90,
+            extent=0,
+            style=tk.ARC,
+            width=5,
+            state="hidden"
+        )
+        # Every item update goes through the mirror, so repeats cost nothing
+        self._items = WidgetMirror(self.canvas, tcl_calls)
+        self._body_image = None  # keeps an evicted animation frame alive while shown
+        self._pending_frames = []
+        self._transition_timer = None
+        self._animation = None
+        self._animation_frame = 0
+        self._animation_timer = None
+        self._animation_paused = False
+        self._min_frame_delay = 0
+        self.frame_mask = None  # HitMask of the animation frame on screen, if any
+
+    def set_body(self, image, transition=None, animation=None):
+        """Show image as the body, first playing any cross-fade frames.
+
+        With an AnimatedSprite, image is its first frame and the rest
+        follow once it is on screen.
+        """
+        self._cancel_transition()
+        self._stop_animation()
+        self._animation = animation
+        if transition:
+            self._pending_frames = list(transition) + [image]
+            self._next_frame()
+        else:
+            self._show(image)
+            self._schedule_animation()
+
+    def _show(self, image):
+        self._body_image = image
+        self._items.itemconfigure(self._body, image=image)
+
+    def _next_frame(self):
+        self._transition_timer = None
+        self._show(self._pending_frames.pop(0))
+        if self._pending_frames:
+            self._transition_timer = self.scheduler.schedule(
+                self.TRANSITION_FRAME_DELAY,
+                self._next_frame
+            )
+        else:
+            self._schedule_animation()
+
+    def _cancel_transition(self):
+        if self._transition_timer:
+            self.scheduler.cancel(self._transition_timer)
+            self._transition_timer = None
+        self._pending_frames = []
+
+    def _schedule_animation(self):
+        if self._animation is None or self._animation_paused or self._animation_timer:
+            return
+        self._animation_timer = self.scheduler.schedule(
+            max(self._animation.duration(self._animation_frame), self._min_frame_delay),
+            self._next_animation_frame
+        )
+
+    def _next_animation_frame(self):
+        self._animation_timer = None
+        self._animation_frame = (self._animation_frame + 1) % self._animation.frame_count
+        image, self.frame_mask, _ = self._animation.frame(self._animation_frame)
+        self._show(image)
+        self._schedule_animation()
+
+    def _stop_animation(self):
+        if self._animation_timer:
+            self.scheduler.cancel(self._animation_timer)
+            self._animation_timer = None
+        self._animation = None
+        self._animation_frame = 0
+        self.frame_mask = None
+
+    def pause_animation(self, paused):
+        """Hold the current animation frame (e.g. in idle mode), or resume"""
+        self._animation_paused = paused
+        if paused and self._animation_timer:
+            self.scheduler.cancel(self._animation_timer)
+            self._animation_timer = None
+        elif not paused and not self._pending_frames:
+            self._schedule_animation()
+
+    def slow_animation(self, min_delay=0):
+        """Show each animation frame for at least min_delay milliseconds; 0 plays at full speed"""
+        self._min_frame_delay = min_delay
+        if self._animation_timer:
+            self.scheduler.cancel(self._animation_timer)
+            self._animation_timer = None
+            self._schedule_animation()
+
+    def stop(self):
+        """Cancel every pending frame before the canvas goes away"""
+        self._cancel_transition()
+        self._stop_animation()
+
+    def show_text(self, text=None):
+        """Draw text in place of the body (e.g. ERROR), or remove it with None"""
+        if text is None:
+            self._items.itemconfigure(self._text, state="hidden")
+        else:
+            self._items.itemconfigure(self._text, text=text, state="normal")
+
+    def set_accessory(self, image=None):
+        """Draw an image over the body, or remove it with None"""
+        if image is None:
+            self._items.itemconfigure(self._accessory, state="hidden")
+        else:
+            self._items.itemconfigure(self._accessory, image=image, state="normal")
+
+    def show_sleep_overlay(self, visible):
+        self._items.itemconfigure(self._zzz, state="normal" if visible else "hidden")
+
+    def show_pomodoro_ring(self, state=None, progress=0.0):
+        """Ring filling up over a Pomodoro interval; state None hides it"""
+        if state is None:
+            self._items.itemconfigure(self._ring, state="hidden")
+            return
+        self._items.itemconfigure(
+            self._ring,
+            state="normal",
+            extent=-359.9 * min(max(progress, 0.0), 1.0),
+            outline=self.RING_COLORS.get(state, "#d9534f")
+        )
+
+
+class StatsChart:
+    """Pomodoro history drawn as one image: a GitHub-style calendar heatmap
+    per year (newest on top) and an hour-of-day histogram below it.
+
+    Days are binned, scaled and colored as whole NumPy arrays, and the
+    last image is reused until the stats change.
+    """
+    COLORS = np.array([
+        (240, 240, 240),  # background, and days after today
+        (225, 228, 232),  # no sessions
+        (155, 233, 168),
+        (64, 196, 99),
+        (48, 161, 78),
+        (33, 110, 57),
+    ], dtype=np.uint8)
+    BAR_COLOR = COLORS[4]
+    TEXT_COLOR = (60, 60, 60)
+    HEATMAP_HEIGHT = 420  # cells shrink so that many years still fit
+    MAX_CELL = 13  # pixels per heatmap cell, including the gap
+    MIN_CELL = 4
+    HISTOGRAM_HEIGHT = 60
+    LABEL_WIDTH = 34  # room for the year labels left of the heatmap
+    MARGIN = 6
+
+    def __init__(self):
+        self._key = None
+        self._photo = None
+
+    def render(self, stats, today, revision):
+        """PhotoImage of the chart, redrawn only when revision or today change"""
+        key = (revision, today, stats.get("total_work_sessions"))
+        if key != self._key:
+            self._photo = ImageTk.PhotoImage(self.render_image(stats, today))
+            self._key = key
+        return self._photo
+
+    @staticmethod
+    def _session_days(daily_sessions):
+        """daily_sessions as (datetime64[D] array, count array), skipping bad keys"""
+        try:
+            days = np.array(list(daily_sessions), dtype="datetime64[D]")
+            counts = np.array(list(daily_sessions.values()), dtype=np.int64)
+        except (ValueError, TypeError):
+            # Hand-edited file: drop whatever doesn't parse
+            valid = {}
+            for day, count in daily_sessions.items():
+                try:
+                    valid[np.datetime64(day, "D")] = int(count)
+                except (ValueError, TypeError):
+                    continue
+            days = np.array(list(valid), dtype="datetime64[D]")
+            counts = np.array(list(valid.values()), dtype=np.int64)
+        return days, counts
+
+    def _heatmap(self, days, counts, today):
+        """Heatmap pixels (H, W, 3) and the (year, y) of each year's row"""
+        last_year = today.astype("datetime64[Y]")
+        first_year = min(days.min(), today).astype("datetime64[Y]") if days.size else last_year
+        years = int((last_year - first_year).astype(int)) + 1
+
+        start = first_year.astype("datetime64[D]")
+        end = (last_year + 1).astype("datetime64[D]")
+        calendar = start + np.arange(int((end - start).astype(int)))
+        offsets = (days - start).astype(int)
+        inside = (offsets >= 0) & (offsets < calendar.size)
+        totals = np.zeros(calendar.size, dtype=np.int64)
+        np.add.at(totals, offsets[inside], counts[inside])
+
+        # Level 1 is an empty day, 2-5 are quarters of the busiest day
+        peak = max(int(totals.max()), 1)
+        levels = np.where(totals > 0, 2 + np.minimum(3, (totals - 1) * 4 // peak), 1)
+        levels[calendar > today] = 0
+
+        # Rows are weekdays (Monday first) with a spacer row between years;
+        # columns are weeks of the year
+        weekday = (calendar.astype(int) + 3) % 7  # 1970-01-01 was a Thursday
+        year_start = calendar.astype("datetime64[Y]").astype("datetime64[D]")
+        week = ((calendar - year_start).astype(int) + (year_start.astype(int) + 3) % 7) // 7
+        year_row = (last_year - calendar.astype("datetime64[Y]")).astype(int) * 8
+        grid = np.zeros((years * 8, 54), dtype=np.uint8)
+        grid[year_row + weekday, week] = levels
+
+        cell = max(self.MIN_CELL, min(self.MAX_CELL, self.HEATMAP_HEIGHT // (years * 8)))
+        gap = 1 if cell < 8 else 2
+        pixels = np.repeat(np.repeat(grid, cell, axis=0), cell, axis=1)
+        in_cell_y = (np.arange(pixels.shape[0]) % cell) < cell - gap
+        in_cell_x = (np.arange(pixels.shape[1]) % cell) < cell - gap
+        pixels[~(in_cell_y[:, None] & in_cell_x[None, :])] = 0
+
+        labels = [
+            (int(str(last_year)) - i, i * 8 * cell)
+            for i in range(years)
+        ]
+        return self.COLORS[pixels], labels
+
+    def _histogram(self, hourly_sessions, width):
+        """Histogram pixels (H, W, 3) of sessions per hour of day"""
+        hours = np.zeros(24, dtype=np.int64)
+        values = np.asarray(hourly_sessions[:24], dtype=np.int64)
+        hours[:values.size] = values
+        bar = max(2, width // 24)
+        heights = hours * self.HISTOGRAM_HEIGHT // max(int(hours.max()), 1)
+        column_heights = np.repeat(heights, bar)
+        filled = np.arange(self.HISTOGRAM_HEIGHT)[::-1, None] < column_heights[None, :]
+        filled &= (np.arange(column_heights.size) % bar < bar - 1)[None, :]
+        pixels = np.where(filled[..., None], self.BAR_COLOR, self.COLORS[0])
+        return pixels.astype(np.uint8), bar
+
+    def render_image(self, stats, today):
+        """Draw the chart for stats as of the date today"""
+        today = np.datetime64(today, "D")
+        days, counts = self._session_days(stats.get("daily_sessions", {}))
+        heatmap, year_labels = self._heatmap(days, counts, today)
+        histogram, bar = self._histogram(stats.get("hourly_sessions") or [], heatmap.shape[1])
+
+        m, left = self.MARGIN, self.LABEL_WIDTH
+        title_height = 14
+        hist_top = m + heatmap.shape[0] + m + title_height
+        height = hist_top + histogram.shape[0] + title_height + m
+        width = left + max(heatmap.shape[1], histogram.shape[1]) + m
+        canvas = np.empty((height, width, 3), dtype=np.uint8)
+        canvas[:] = self.COLORS[0]
+        canvas[m:m + heatmap.shape[0], left:left + heatmap.shape[1]] = heatmap
+        canvas[hist_top:hist_top + histogram.shape[0], left:left + histogram.shape[1]] = histogram
+
+        # A handful of labels; everything else came from the arrays above
+        image = Image.fromarray(canvas, "RGB")
+        draw = ImageDraw.Draw(image)
+        font = ImageFont.load_default()
+        for year, y in year_labels:
+            draw.text((2, m + y), str(year), fill=self.TEXT_COLOR, font=font)
+        draw.text((left, hist_top - title_height), "Sessions by hour of day",
+                  fill=self.TEXT_COLOR, font=font)
+        for hour in (0, 6, 12, 18):
+            draw.text((left + hour * bar, hist_top + histogram.shape[0] + 2), str(hour),
+                      fill=self.TEXT_COLOR, font=font)
+        return image
+
+
+class SystemClock:
+    """Wall-clock time"""
+
+    def now(self):
+        return datetime.now()
+
+    def monotonic(self):
+        return time.monotonic()
+
+
+class VirtualClock:
+    """Clock that only moves when told to, for replays"""
+
+    def __init__(self, start):
+        self._start = start
+        self._elapsed = 0.0  # seconds
+
+    def now(self):
+        return self._start + timedelta(seconds=self._elapsed)
+
+    def monotonic(self):
+        return self._elapsed
+
+    def advance_to(self, seconds):
+        self._elapsed = max(self._elapsed, seconds)
+
+
+class Scheduler:
+    """Timer service shared by all pets; counts the wakeups it causes"""
+
+    def __init__(self, root, clock):
+        self.root = root
+        self.clock = clock
+        self._wakeups = deque()  # clock.monotonic() timestamps of timer wakeups
+
+    def _record_wakeup(self):
+        now = self.clock.monotonic()
+        self._wakeups.append(now)
+        while self._wakeups[0] < now - 60:
+            self._wakeups.popleft()
+
+    def schedule(self, delay, callback):
+        """Run callback after delay milliseconds. Returns an id for cancel()."""
+        def wakeup():
+            self._record_wakeup()
+            callback()
+        return self.root.after(delay, wakeup)
+
+    def cancel(self, timer_id):
+        self.root.after_cancel(timer_id)
+
+    def wakeups_per_minute(self):
+        """Number of timer wakeups during the last 60 seconds"""
+        cutoff = self.clock.monotonic() - 60
+        while self._wakeups and self._wakeups[0] < cutoff:
+            self._wakeups.popleft()
+        return len(self._wakeups)
+
+
+class VirtualScheduler(Scheduler):
+    """Scheduler driven by a VirtualClock instead of the Tk event loop.
+
+    Nothing fires until run_until() is called; callbacks then run in due
+    order with the clock set to each one's due time.
+    """
+
+    def __init__(self, clock):
+        super().__init__(None, clock)
+        self._queue = []  # heap of (due seconds, timer id, callback)
+        self._cancelled = set()
+        self._ids = itertools.count(1)
+        self.fired = 0
+
+    def schedule(self, delay, callback):
+        timer_id = next(self._ids)
+        heapq.heappush(self._queue, (self.clock.monotonic() + delay / 1000, timer_id, callback))
+        return timer_id
+
+    def cancel(self, timer_id):
+        self._cancelled.add(timer_id)
+
+    def run_until(self, seconds):
+        """Fire every timer due up to `seconds` and leave the clock there"""
+        while self._queue and self._queue[0][0] <= seconds:
+            due, timer_id, callback = heapq.heappop(self._queue)
+            if timer_id in self._cancelled:
+                self._cancelled.discard(timer_id)
+                continue
+            self.clock.advance_to(due)
+            self._record_wakeup()
+            self.fired += 1
+            callback()
+        self.clock.advance_to(seconds)
+
+
+class PersistenceWriter:
+    """Single writer for every pet's JSON files.
+
+    Saves are coalesced: a file written several times before the event loop
+    goes idle hits the disk once, via a temp file and atomic rename.
+    """
+
+    def __init__(self, root, persist=True, on_written=None):
+        self.root = root
+        self.persist = persist  # False keeps replays off the real data files
+        self.on_written = on_written  # called with each path after it is replaced
+        self._pending = {}  # path -> object to serialise
+        self._flush_scheduled = False
+
+    def write(self, path, data):
+        if not self.persist:
+            return
+        self._pending[path] = data
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after_idle(self.flush)
+
+    def flush(self):
+        """Write everything pending now"""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        for path, data in pending.items():
+            try:
+                with open(f"{path}.tmp", "w") as f:
+                    json.dump(data, f)
+                os.replace(f"{path}.tmp", path)
+                if self.on_written:
+                    self.on_written(path)
+            except OSError as e:
+                print(f"Error saving {path}: {e}")
+
+
+class FocusLog:
+    """Minute-resolution record of when focus and break time happened.
+
+    Every day is one fixed-size record of two 1440-bit maps (focus, then
+    break), 360 bytes in all, in a memory-mapped file. A date's record is
+    found by arithmetic from the first day in the file, and queries are
+    NumPy popcounts over the bits rather than scans over sessions.
+    """
+    MAGIC = b"DPFOCUS1"
+    HEADER = struct.Struct("<8si")  # magic, ordinal of the first day's date
+    MINUTES = 24 * 60
+    DAY_BYTES = MINUTES // 8
+    KINDS = ("focus", "break")
+    RECORD_BYTES = len(KINDS) * DAY_BYTES
+
+    def __init__(self, path, persist=True):
+        self.path = path
+        self.persist = persist  # False keeps everything in memory (replays)
+        self._first = None  # date ordinal of record 0
+        self._records = np.zeros((0, self.RECORD_BYTES), dtype=np.uint8)
+        if persist and os.path.exists(path):
+            self._open()
+
+    def _open(self):
+        try:
+            with open(self.path, "rb") as f:
+                magic, first = self.HEADER.unpack(f.read(self.HEADER.size))
+            if magic != self.MAGIC:
+                raise ValueError("not a focus log")
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Ignoring unreadable focus log {self.path}: {e}")
+            self.persist = False  # don't overwrite what we can't read
+            return
+        self._first = first
+        self._map(self._days_on_disk())
+
+    def _days_on_disk(self):
+        return (os.path.getsize(self.path) - self.HEADER.size) // self.RECORD_BYTES
+
+    def _map(self, days):
+        if days:
+            self._records = np.memmap(
+                self.path,
+                dtype=np.uint8,
+                mode="r+",
+                offset=self.HEADER.size,
+                shape=(days, self.RECORD_BYTES)
+            )
+
+    def _record(self, day, create=False):
+        """Row of self._records for a date, growing the log if create is set"""
+        if self._first is None:
+            if not create:
+                return None
+            self._first = day.toordinal()
+            if self.persist:
+                with open(self.path, "wb") as f:
+                    f.write(self.HEADER.pack(self.MAGIC, self._first))
+        index = day.toordinal() - self._first
+        if index < 0:
+            return None  # before the log started (clock set back)
+        if index >= len(self._records):
+            if not create:
+                return None
+            self._grow(index + 1)
+        return index
+
+    def _grow(self, days):
+        if self.persist:
+            # Unmap first: Windows can't resize a mapped file
+            if isinstance(self._records, np.memmap):
+                self._records.flush()
+            self._records = np.zeros((0, self.RECORD_BYTES), dtype=np.uint8)
+            with open(self.path, "r+b") as f:
+                f.truncate(self.HEADER.size + days * self.RECORD_BYTES)
+            self._map(days)
+        else:
+            grown = np.zeros((days, self.RECORD_BYTES), dtype=np.uint8)
+            grown[:len(self._records)] = self._records
+            self._records = grown
+
+    def _bits(self, index, kind):
+        column = self.KINDS.index(kind) * self.DAY_BYTES
+        return self._records[index, column:column + self.DAY_BYTES]
+
+    def _days(self, start, end):
+        """(date, first minute, end minute) for each day touched by [start, end)"""
+        day = start.date()
+        while datetime.combine(day, datetime.min.time()) < end:
+            day_start = datetime.combine(day, datetime.min.time())
+            first = max(0, int((start - day_start).total_seconds() // 60))
+            last = min(self.MINUTES, int((end - day_start).total_seconds() // 60))
+            if last > first:
+                yield day, first, last
+            day += timedelta(days=1)
+
+    def mark(self, kind, start, end):
+        """Record [start, end) as focus or break time"""
+        for day, first, last in self._days(start, end):
+            index = self._record(day, create=True)
+            if index is None:
+                continue
+            bytes_ = self._bits(index, kind)
+            bits = np.unpackbits(bytes_)
+            bits[first:last] = 1
+            bytes_[:] = np.packbits(bits)
+
+    def minutes(self, kind, start, end):
+        """Minutes of focus or break time recorded between two datetimes"""
+        total = 0
+        for day, first, last in self._days(start, end):
+            index = self._record(day)
+            if index is not None:
+                total += int(np.unpackbits(self._bits(index, kind))[first:last].sum())
+        return total
+
+    def most_productive_hour(self, kind="focus"):
+        """Hour of day (0-23) with the most recorded minutes, or None"""
+        if not len(self._records):
+            return None
+        column = self.KINDS.index(kind) * self.DAY_BYTES
+        bits = np.unpackbits(self._records[:, column:column + self.DAY_BYTES], axis=1)
+        per_hour = bits.reshape(-1, 24, 60).sum(axis=(0, 2))
+        return int(per_hour.argmax()) if per_hour.any() else None
+
+    def close(self):
+        if isinstance(self._records, np.memmap):
+            self._records.flush()
+        self._records = np.zeros((0, self.RECORD_BYTES), dtype=np.uint8)
+
+
+class ReminderArchive:
+    """Append-only, gzip-compressed history of reminders that are done.
+
+    Each archived reminder is appended as its own gzip member holding one
+    JSON line, so archiving never rewrites the file. A small text index
+    next to it holds the byte offset where each archive date begins;
+    queries seek there and stream records from disk. A record left
+    half-written by a crash ends reading there and is cut off before the
+    next append.
+    """
+
+    def __init__(self, path, index_path, persist=True):
+        self.path = path
+        self.index_path = index_path
+        self.persist = persist  # False archives nothing (replays)
+        self._index = []  # (YYYY-MM-DD, byte offset of that date's first record)
+        self._tail_checked = False
+        try:
+            with open(index_path, "r") as f:
+                for line in f:
+                    date, offset = line.split()
+                    self._index.append((date, int(offset)))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Ignoring damaged archive index {index_path}: {e}")
+            self._index = []
+
+    def add(self, reminder, outcome, when):
+        """Append a dismissed or deleted reminder to the archive"""
+        if not self.persist:
+            return
+        archived_at = when.strftime(REMINDER_TIME_FORMAT)
+        record = dict(reminder, outcome=outcome, archived_at=archived_at)
+        line = json.dumps(record).encode("utf-8") + b"\n"
+        try:
+            if not self._tail_checked:
+                self._trim_torn_tail()
+                self._tail_checked = True
+            with open(self.path, "ab") as f:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(gzip.compress(line))
+            date = archived_at[:10]
+            if not self._index or date > self._index[-1][0]:
+                with open(self.index_path, "a") as f:
+                    f.write(f"{date} {offset}\n")
+                self._index.append((date, offset))
+        except OSError as e:
+            print(f"Error archiving reminder: {e}")
+
+    def _trim_torn_tail(self):
+        """Cut off a damaged last record so records appended after it stay readable"""
+        start = self._index[-1][1] if self._index else 0
+        try:
+            f = open(self.path, "r+b")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(start)
+            data = f.read()
+            good = 0  # end of the last complete member
+            while good < len(data):
+                member = zlib.decompressobj(16 + zlib.MAX_WBITS)  # one gzip member
+                try:
+                    member.decompress(data[good:])
+                except zlib.error:
+                    break
+                if not member.eof:
+                    break
+                good = len(data) - len(member.unused_data)
+            if good < len(data):
+                print(f"Trimming {len(data) - good} damaged bytes from the end of {self.path}")
+                f.truncate(start + good)
+
+    def _start_offset(self, start):
+        """Where records archived on or after the date start begin"""
+        if start is None or not self._index:
+            return 0
+        dates = [date for date, _ in self._index]
+        position = bisect.bisect_left(dates, start)
+        if position == len(dates):
+            # Nothing indexed that late; a record may still follow the last entry
+            position -= 1
+        return self._index[position][1]
+
+    def records(self, start=None, end=None):
+        """Stream archived reminders whose archive date is within [start, end].
+
+        Dates are YYYY-MM-DD strings; either end may be None for open-ended.
+        """
+        if not self.persist or not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._start_offset(start))
+            with gzip.GzipFile(fileobj=f) as archive:
+                try:
+                    for line in archive:
+                        record = json.loads(line)
+                        date = record["archived_at"][:10]
+                        if end is not None and date > end:
+                            break  # Archive dates only grow
+                        if start is None or date >= start:
+                            yield record
+                except (EOFError, OSError, zlib.error, ValueError, KeyError) as e:
+                    # Truncated or damaged member, e.g. after a crash mid-append
+                    print(f"Stopped reading damaged archive {self.path}: {e}")
+
+
+class DataFileWatcher:
+    """Notices data files changed on disk by someone else.
+
+    On Linux the files' directories are watched with inotify; elsewhere, or
+    if inotify is unavailable, their mtime and size are polled, rarely
+    while the pets are idle and at once when they wake. Writes we made
+    ourselves are recognised by note_written() and ignored.
+    """
+    POLL_INTERVAL = 2000  # milliseconds
+    IDLE_POLL_INTERVAL = 5 * 60 * 1000  # externally added reminders are at most this late
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+    def __init__(self, root, scheduler):
+        self.root = root
+        self.scheduler = scheduler
+        self._callbacks = {}  # absolute path -> callback
+        self._signatures = {}  # absolute path -> (mtime_ns, size) last seen
+        self._watched_dirs = {}  # inotify watch descriptor -> directory
+        self._inotify_fd = None
+        self.polling = False  # some path isn't covered by inotify
+        self._idle = False
+        self._poll_timer = None
+        self._start_inotify()
+
+    def _start_inotify(self):
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            self.root.tk.createfilehandler(fd, tk.READABLE, self._on_inotify)
+        except (OSError, AttributeError, tk.TclError) as e:
+            print(f"inotify unavailable, polling data files instead: {e}")
+            return
+        self._libc = libc
+        self._inotify_fd = fd
+
+    @staticmethod
+    def _signature(path):
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def watch(self, path, callback):
+        """Call callback() whenever path changes on disk"""
+        path = os.path.abspath(path)
+        self._callbacks[path] = callback
+        self._signatures[path] = self._signature(path)
+
+        directory = os.path.dirname(path)
+        if self._inotify_fd is not None:
+            if directory in self._watched_dirs.values():
+                return
+            mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+            wd = self._libc.inotify_add_watch(self._inotify_fd, directory.encode(), mask)
+            if wd >= 0:
+                self._watched_dirs[wd] = directory
+                return
+            print(f"Could not watch {directory}, polling instead")
+        self.polling = True
+        if self._poll_timer is None:
+            self._schedule_poll()
+
+    def unwatch(self, path):
+        path = os.path.abspath(path)
+        self._callbacks.pop(path, None)
+        self._signatures.pop(path, None)
+
+    def note_written(self, path):
+        """Remember our own write so it isn't mistaken for an external edit"""
+        path = os.path.abspath(path)
+        if path in self._callbacks:
+            self._signatures[path] = self._signature(path)
+
+    def check(self, path):
+        """Run the callback now if path changed since we last saw it"""
+        path = os.path.abspath(path)
+        if path not in self._callbacks:
+            return
+        signature = self._signature(path)
+        if signature != self._signatures[path]:
+            self._signatures[path] = signature
+            self._callbacks[path]()
+
+    def _on_inotify(self, *args):
+        try:
+            data = os.read(self._inotify_fd, 65536)
+        except BlockingIOError:
+            return
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if wd in self._watched_dirs:
+                changed.add(os.path.join(self._watched_dirs[wd], name))
+        for path in changed:
+            self.check(path)
+
+    def set_idle(self, idle):
+        """Poll rarely while idle; check everything again on waking"""
+        if idle == self._idle:
+            return
+        self._idle = idle
+        if not self.polling:
+            return
+        if self._poll_timer:
+            self.scheduler.cancel(self._poll_timer)
+            self._poll_timer = None
+        if idle:
+            self._schedule_poll()
+        else:
+            self._poll()
+
+    def _schedule_poll(self):
+        interval = self.IDLE_POLL_INTERVAL if self._idle else self.POLL_INTERVAL
+        self._poll_timer = self.scheduler.schedule(interval, self._poll)
+
+    def _poll(self):
+        self._poll_timer = None
+        for path in list(self._callbacks):
+            self.check(path)
+        self._schedule_poll()
+
+    def close(self):
+        self.polling = False
+        if self._poll_timer:
+            self.scheduler.cancel(self._poll_timer)
+            self._poll_timer = None
+        if self._inotify_fd is not None:
+            try:
+                self.root.tk.deletefilehandler(self._inotify_fd)
+            except tk.TclError:
+                pass
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+
 class DeskPet:
-    LOCK_FILE = "deskpet.lock"
     POMODORO_WORK = 25  # minutes
     POMODORO_BREAK = 5  # minutes
     POMODORO_LONG_BREAK = 15  # minutes
     WALK_SPEED = 2  # pixels per frame
     WALK_DISTANCE = 100  # pixels to walk before turning
     WALK_FRAME_DELAY = 200  # milliseconds between animation frames
-
-    def __init__(self):
-        print("Initializing...")
-        # Check for other instances first
-        if self.is_already_running():
-            print("Another instance is already running. Closing it...")
-            self.cleanup_previous_instance()
-        
-        # Create lock file
-        self.create_lock_file()
-        print("Lock file created")
-        
-        self.root = tk.Tk()
+    BUBBLE_OFFSET = (180, 140)  # where the bubble's tail meets the pet, relative to the pet window
+    PET_SIZE = (200, 200)
+    SLEEP_DELAY = 30000  # milliseconds of no interaction before sleeping
+    SLEEP_FRAME_DELAY = 2000  # milliseconds per frame of an animated sleep sprite while idle
+    REMINDER_MAX_WAIT = 15 * 60  # seconds; re-check at least this often in case the clock jumps
+    REMINDER_REPROMPT_DELAY = 30000  # milliseconds before a closed reminder prompt returns
+    HISTORY_DAYS = 30  # archived reminders shown in the history window
+    HISTORY_LIMIT = 200  # most recent entries listed there
+
+    def __init__(self, host, name=DEFAULT_PET):
+        print(f"Initializing pet {name!r}...")
+        self.host = host
+        self.name = name
+        self.scheduler = host.scheduler
+        self.clock = host.clock
+
+        # The pet's own window; the Tk root belongs to the host
+        self.root = tk.Toplevel(host.root)
         print("Tkinter window created")
         self.root.overrideredirect(True)  # Remove window decorations
         self.root.attributes('-topmost', True)  # Keep window on top
@@ -59,21 +1648,51 @@ class DeskPet:
         self._setup_bindings()
         self._initialize_windows()
         
-        # Initialize reminders
+        # Initialize reminders; done ones go to the archive on disk
         self.reminders = self.load_reminders()
+        self.archive = ReminderArchive(
+            self._data_file("reminders-archive", "jsonl.gz"),
+            self._data_file("reminders-archive", "idx"),
+            self.host.writer.persist
+        )
+        self._remember_disk_reminders(self.reminders)
         self.check_reminders()
 
+        # Pick up edits made to the data files by other programs
+        self.host.watcher.watch(self._data_file("reminders"), self.sync_reminders_from_disk)
+        self.host.watcher.watch(self._data_file("pomodoro_stats"), self.sync_stats_from_disk)
+
+        # Build dialogs once the pet is on screen and the event loop is idle
+        self.root.after_idle(self._prewarm_dialogs)
+        self.start_sleep_timer()
+
     def _initialize_state_variables(self):
         """Initialize all state variables"""
-        self._drag_data = {"x": 0, "y": 0, "dragging": False}
+        self._drag_data = {"x": 0, "y": 0, "pressed": False, "dragging": False}
+        self.hit_masks = {}
+        self._current_image_key = "normal"
+        self._hovering = False
         self._popup_visible = False
         self._settings_window = None
         self._reminder_window = None
+        self._reminders_list_window = None
+        self._history_window = None
+        self._stats_window = None
         self._current_reminder_label = None
         self._ignore_next_click = False
         self._popup_timer = None
         self._sleep_timer = None
         self._current_state = "normal"
+
+        # Low-power idle mode: set while asleep or while the display is locked
+        self._idle = False
+        self._display_locked = False
+        self._resume_walking = False
+        self._reminder_timer = None
+        self._reminder_timer_due = None  # due time of the reminder the timer is armed for
+        self._reminder_prompts = {}  # reminder id -> open action window, or None while deferred
+        self._reprompt_timers = {}  # reminder id -> timer asking again after a deferral
+        self._notification_timers = set()  # timers closing notification windows
         
         # Walking animation state
         self._walking = False
@@ -86,77 +1705,153 @@ class DeskPet:
         self._pomodoro_active = False
         self._pomodoro_state = "inactive"
         self._pomodoro_time_left = 0
+        self._pomodoro_deadline = None
         self._pomodoro_sessions = 0
         self._pomodoro_timer = None
         
         # Initialize statistics
         self.stats = self.load_stats()
+        self._remember_disk_stats(self.stats)
+        self._stats_revision = 0  # bumped whenever sessions are added, for the chart cache
+        self.stats_chart = StatsChart()
+        self.focus_log = FocusLog(self._data_file("focus", "bin"), self.host.writer.persist)
+        
+        # Sprite theme, optionally a different one per Pomodoro state
+        self.settings = self.load_settings()
+        self._applied_theme = None
 
     def _load_images(self):
         """Load and resize all images"""
+        sprites = self.host.sprites
+        # Created first so the error fallback can draw on it too
+        self.compositor = SpriteCompositor(
+            self.pet_frame,
+            self.PET_SIZE,
+            self.scheduler,
+            self.host.tcl_calls
+        )
+        self._load_sprites(self._active_theme())
+        
+        print("Loading speech bubble...")
+        self.bubble_renderer = sprites.bubble_renderer()
+        
+        self.compositor.set_body(self.pet_images["normal"], animation=self._animations["normal"])
+        self.pet_widget = self.compositor.canvas
+        self.pet_widget.pack()
+
+    def _load_sprites(self, theme=None):
+        """Fill pet_images, hit_masks and the sprite keys with a theme's sprites"""
+        sprites = self.host.sprites
+        self._applied_theme = theme
         self.pet_images = {}
-        for state, filename in [
-            ("normal", "pet.png"),
-            ("hover", "petopen.png"),
-            ("sleep", "petsleep.png"),
-            ("walk1", "petwalk1.png"),
-            ("walk2", "petwalk2.png")
+        self._sprite_keys = {}  # image key -> SpriteCache key, for cross-fades
+        self._animations = {}  # image key -> AnimatedSprite, for animated files
+        for state, base in [
+            ("normal", "pet"),
+            ("hover", "petopen"),
+            ("sleep", "petsleep"),
+            ("walk1", "petwalk1"),
+            ("walk2", "petwalk2")
         ]:
+            filename = SpriteCache.find(base)
             print(f"Loading {filename}...")
             try:
-                original_image = Image.open(filename)
-                resized_image = original_image.resize(
-                    (200, 200),
-                    Image.Resampling.BICUBIC
-                )
-                self.pet_images[state] = ImageTk.PhotoImage(resized_image)
+                self.pet_images[state], self.hit_masks[state] = \
+                    sprites.get(filename, self.PET_SIZE, theme=theme)
+                self._sprite_keys[state] = (filename, self.PET_SIZE, False, theme)
+                self._animations[state] = sprites.animation(filename, self.PET_SIZE, theme=theme)
                 
                 # Create flipped versions for walking images
                 if state in ["walk1", "walk2"]:
-                    flipped_image = resized_image.transpose(Image.FLIP_LEFT_RIGHT)
-                    self.pet_images[f"{state}_flipped"] = ImageTk.PhotoImage(flipped_image)
+                    self.pet_images[f"{state}_flipped"], self.hit_masks[f"{state}_flipped"] = \
+                        sprites.get(filename, self.PET_SIZE, flipped=True, theme=theme)
+                    self._sprite_keys[f"{state}_flipped"] = (filename, self.PET_SIZE, True, theme)
+                    self._animations[f"{state}_flipped"] = \
+                        sprites.animation(filename, self.PET_SIZE, flipped=True, theme=theme)
             except Exception as e:
                 print(f"Warning: Could not load {filename}: {e}")
                 # Use normal image as fallback for walking frames
                 if state in ["walk1", "walk2"]:
                     self.pet_images[state] = self.pet_images["normal"]
                     self.pet_images[f"{state}_flipped"] = self.pet_images["normal"]
-        
-        print("Loading speech bubble...")
-        bubble_image = Image.open("speechbubble.png")
-        resized_bubble = bubble_image.resize(
-            (250, 100),
-            Image.Resampling.BICUBIC
-        )
-        self.speech_bubble_image = ImageTk.PhotoImage(resized_bubble)
-        
-        self.pet_label = tk.Label(
-            self.pet_frame,
-            image=self.pet_images["normal"],
-            bg='SystemButtonFace'
+                    self.hit_masks[state] = self.hit_masks["normal"]
+                    self.hit_masks[f"{state}_flipped"] = self.hit_masks["normal"]
+                    self._sprite_keys[state] = self._sprite_keys["normal"]
+                    self._sprite_keys[f"{state}_flipped"] = self._sprite_keys["normal"]
+
+    def load_settings(self):
+        """Load the pet's theme settings"""
+        settings = {"theme": None, "pomodoro_themes": {}}
+        try:
+            with open(self._data_file("settings"), "r") as f:
+                settings.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return settings
+
+    def save_settings(self):
+        self.host.writer.write(self._data_file("settings"), self.settings)
+
+    def _active_theme(self):
+        """Theme for the current Pomodoro state, else the pet's own theme"""
+        theme = self.settings["theme"]
+        if self._pomodoro_active:
+            theme = self.settings["pomodoro_themes"].get(self._pomodoro_state) or theme
+        return theme if theme in THEMES else None
+
+    def apply_theme(self):
+        """Cross-fade to the active theme's sprites if it changed"""
+        theme = self._active_theme()
+        if theme == self._applied_theme or not self.pet_images:
+            return  # Unchanged, or showing the error fallback
+        print(f"Applying theme: {theme or 'none'}")
+        previous_key = self._sprite_keys.get(self._current_image_key)
+        self._load_sprites(theme)
+        key = self._current_image_key
+        transition = None
+        if not self._idle and previous_key:
+            transition = self.host.sprites.transition(previous_key, self._sprite_keys[key])
+        self.compositor.set_body(
+            self.pet_images[key],
+            transition,
+            animation=self._animations.get(key)
         )
-        self.pet_label.pack()
+
+    def set_theme(self, theme, pomodoro_state=None):
+        """Set the pet's theme, or the theme for one Pomodoro state; None clears it"""
+        if theme is not None and theme not in THEMES:
+            raise ValueError(f"Unknown theme {theme!r}; choose from {', '.join(THEMES)}")
+        if pomodoro_state is None:
+            self.settings["theme"] = theme
+        elif pomodoro_state in ("work", "break", "long_break"):
+            self.settings["pomodoro_themes"][pomodoro_state] = theme
+        else:
+            raise ValueError(f"Unknown Pomodoro state {pomodoro_state!r}")
+        self.save_settings()
+        self.apply_theme()
 
     def _create_error_label(self):
-        """Create error label when image loading fails"""
-        self.pet_label = tk.Label(
-            self.pet_frame,
-            text="ERROR",
-            font=("Arial", 40),
-            bg='SystemButtonFace'
-        )
-        self.pet_label.pack()
+        """Show ERROR in place of the pet when image loading fails"""
+        # Don't draw whichever sprites did load over the error
+        self.pet_images = {}
+        self.hit_masks = {}
+        self._sprite_keys = {}
+        self._animations = {}
+        self.compositor.show_text("ERROR")
+        self.pet_widget = self.compositor.canvas
+        self.pet_widget.pack()
 
     def _setup_bindings(self):
         """Set up all event bindings"""
         # Bind mouse events
-        self.pet_label.bind('<Button-1>', self.on_drag_start)
-        self.pet_label.bind('<B1-Motion>', self.on_drag_motion)
-        self.pet_label.bind('<ButtonRelease-1>', self.on_drag_stop)
-        self.pet_label.bind('<Button-3>', self.show_reminders)
-        self.pet_label.bind('<Double-Button-1>', self.show_popup)
-        self.pet_label.bind('<Enter>', self.on_enter)
-        self.pet_label.bind('<Leave>', self.on_leave)
+        self.pet_widget.bind('<Button-1>', self.on_drag_start)
+        self.pet_widget.bind('<B1-Motion>', self.on_drag_motion)
+        self.pet_widget.bind('<ButtonRelease-1>', self.on_drag_stop)
+        self.pet_widget.bind('<Button-3>', self.show_reminders)
+        self.pet_widget.bind('<Double-Button-1>', self.show_popup)
+        self.pet_widget.bind('<Enter>', self.on_enter)
+        self.pet_widget.bind('<Motion>', self.on_motion)
+        self.pet_widget.bind('<Leave>', self.on_leave)
         
         # Bind popup events
         self.popup.bind('<Enter>', self.reset_popup_timer)
@@ -180,22 +1875,18 @@ class DeskPet:
         bubble_frame = tk.Frame(self.voice_bubble, bg='SystemButtonFace')
         bubble_frame.pack(fill=tk.BOTH, expand=True)
         
+        # Bubble and text arrive pre-rendered as one image
         self.bubble_label = tk.Label(
             bubble_frame,
-            image=self.speech_bubble_image,
-            bg='SystemButtonFace'
+            bg='SystemButtonFace',
+            borderwidth=0
         )
         self.bubble_label.pack()
+        self._bubble_image = None
         
-        self.voice_label = tk.Label(
-            bubble_frame,
-            text="",
-            wraplength=200,
-            font=('Arial', 12, 'bold'),
-            bg='#bdbdbd',  # Light gray background
-            fg='black'
-        )
-        self.voice_label.place(relx=0.5, rely=0.5, anchor="center")
+        # Hover and drag re-apply the same image and position over and over
+        self.voice_bubble = WidgetMirror(self.voice_bubble, self.host.tcl_calls)
+        self.bubble_label = WidgetMirror(self.bubble_label, self.host.tcl_calls)
 
     def _create_timer_window(self):
         """Create the timer window"""
@@ -222,65 +1913,161 @@ class DeskPet:
             width=3,
             command=self.stop_pomodoro
         ).pack(pady=(0, 5))
+        
+        # The countdown re-applies the same position and visibility every second
+        self.timer_window = WidgetMirror(self.timer_window, self.host.tcl_calls)
+        self.timer_label = WidgetMirror(self.timer_label, self.host.tcl_calls)
 
         # Bind cleanup on window close
-        self.root.protocol("WM_DELETE_WINDOW", self.cleanup_and_exit)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
-    def is_already_running(self):
-        """Check if another instance is running"""
-        return os.path.exists(self.LOCK_FILE)
+    def _data_file(self, base, extension="json"):
+        """Per-pet data file; the default pet keeps the original file names"""
+        if self.name == DEFAULT_PET:
+            return f"{base}.{extension}"
+        return f"{base}-{self.name}.{extension}"
 
-    def cleanup_previous_instance(self):
-        """Kill the previous instance"""
+    def close(self):
+        """Close this pet; the host exits when the last one is gone"""
         try:
-            # Try to remove the lock file
-            if os.path.exists(self.LOCK_FILE):
-                os.remove(self.LOCK_FILE)
-            
-            # On Windows, use taskkill to force close previous Python instances
-            if os.name == 'nt':  # Windows
-                os.system('taskkill /F /IM python.exe /T')
+            for timer in (self._walk_timer, self._pomodoro_timer, self._reminder_timer,
+                          self._sleep_timer, self._popup_timer,
+                          *self._reprompt_timers.values(), *self._notification_timers):
+                if timer:
+                    self.scheduler.cancel(timer)
+            self._reprompt_timers.clear()
+            self._notification_timers.clear()
+            self.compositor.stop()
+            self.focus_log.close()
+            self.host.watcher.unwatch(self._data_file("reminders"))
+            self.host.watcher.unwatch(self._data_file("pomodoro_stats"))
+            # Dialogs, bubble and timer windows are children of the pet window
+            self.root.destroy()
         except Exception as e:
-            print(f"Error cleaning up previous instance: {e}")
+            print(f"Error during cleanup: {e}")
+        finally:
+            self.host.remove_pet(self.name)
 
-    def create_lock_file(self):
-        """Create a lock file to indicate this instance is running"""
+    def handle_command(self, args, stdin_text=""):
+        """Apply parsed command-line arguments to this pet"""
+        replies = []
         try:
-            with open(self.LOCK_FILE, 'w') as f:
-                f.write(str(os.getpid()))
-        except Exception as e:
-            print(f"Error creating lock file: {e}")
+            if args.add_reminder:
+                due = args.due or self.clock.now().strftime(REMINDER_TIME_FORMAT)
+                self.reminders.extend(
+                    parse_reminder_lines(f"{due} {args.add_reminder}", self.clock.now())
+                )
+                self.save_reminders()
+                self._arm_reminder_timer()
+                self.show_voice_bubble(text="Reminder set!")
+                replies.append("Reminder added")
 
-    def cleanup_and_exit(self):
-        """Clean up resources before exiting"""
-        try:
-            if os.path.exists(self.LOCK_FILE):
-                os.remove(self.LOCK_FILE)
-            if self._walk_timer:
-                self.root.after_cancel(self._walk_timer)
-            if self.timer_window:
-                self.timer_window.destroy()
-            if self.root:
-                self.root.quit()
-                self.root.destroy()
-        except Exception as e:
-            print(f"Error during cleanup: {e}")
-        finally:
-            sys.exit(0)
+            if args.import_reminders and stdin_text:
+                imported = parse_reminder_lines(stdin_text, self.clock.now())
+                self.reminders.extend(imported)
+                self.save_reminders()
+                self._arm_reminder_timer()
+                replies.append(f"Imported {len(imported)} reminders")
+
+            if args.start_pomodoro:
+                self.start_pomodoro()
+                replies.append("Pomodoro started")
+
+            if args.theme:
+                self.set_theme(None if args.theme == "none" else args.theme)
+                replies.append(f"Theme set to {args.theme}")
+
+            for assignment in args.pomodoro_theme or []:
+                state, _, theme = assignment.partition("=")
+                self.set_theme(None if theme in ("", "none") else theme, state)
+                replies.append(f"{state} theme set to {theme or 'none'}")
+
+            if args.history is not None:
+                replies.extend(self.reminder_history(args.history) or ["No archived reminders"])
+
+            if args.show:
+                self.root.deiconify()
+                self.root.lift()
+                self.reset_sleep_timer()
+                replies.append("Pet shown")
+        except (ValueError, KeyError) as e:
+            print(f"Error handling command: {e}")
+            replies.append(f"Error: {e}")
+        return "\n".join(replies)
+
+    def enter_idle_mode(self):
+        """Suspend every timer except the next reminder or Pomodoro boundary"""
+        if self._idle:
+            return
+        self._idle = True
+        print("Entering idle mode")
+        self.host.update_idle()
+
+        if self._walk_timer:
+            self.scheduler.cancel(self._walk_timer)
+            self._walk_timer = None
+            self._resume_walking = self._walking
+        self._update_idle_animation()
+        self.hide_popup()
+
+        # Replace the per-second countdown with one wakeup at the boundary
+        if self._pomodoro_active:
+            if self._pomodoro_timer:
+                self.scheduler.cancel(self._pomodoro_timer)
+            self.update_pomodoro_timer()
+
+    def exit_idle_mode(self):
+        """Resume the timers suspended by enter_idle_mode"""
+        if not self._idle or self._display_locked:
+            return
+        self._idle = False
+        print("Leaving idle mode")
+        self.host.update_idle()
+        self._update_idle_animation()
+
+        if self._pomodoro_active:
+            if self._pomodoro_timer:
+                self.scheduler.cancel(self._pomodoro_timer)
+            self.update_pomodoro_timer()
+        if self._resume_walking:
+            self._resume_walking = False
+            self.update_walking()
+
+    def set_display_locked(self, locked):
+        """Enter or leave idle mode when the session is locked or unlocked"""
+        self._display_locked = locked
+        if locked:
+            self.enter_idle_mode()
+        elif self._current_state != "sleep":
+            self.exit_idle_mode()
+        self._update_idle_animation()
+
+    def _update_idle_animation(self):
+        """Only an animated sleep sprite plays while idle, slowly, and not while locked"""
+        if not self._idle:
+            self.compositor.slow_animation(0)
+            self.compositor.pause_animation(False)
+        elif self._current_state == "sleep" and not self._display_locked:
+            self.compositor.slow_animation(self.SLEEP_FRAME_DELAY)
+            self.compositor.pause_animation(False)
+        else:
+            self.compositor.pause_animation(True)
 
     def reset_popup_timer(self, event=None):
         """Reset the popup timer when mouse enters popup"""
         if self._popup_timer:
-            self.root.after_cancel(self._popup_timer)
+            self.scheduler.cancel(self._popup_timer)
             self._popup_timer = None
 
     def start_popup_timer(self, event=None):
         """Start the timer to hide popup after 10 seconds"""
         self.reset_popup_timer()
-        self._popup_timer = self.root.after(10000, self.hide_popup)
+        self._popup_timer = self.scheduler.schedule(10000, self.hide_popup)
 
     def show_popup(self, event):
         """Show the popup menu and start the timer"""
+        if not self.is_on_pet(event):
+            return
         if not self._popup_visible and not self._drag_data["dragging"]:
             x = self.root.winfo_x()
             y = self.root.winfo_y() - 50
@@ -334,26 +2121,121 @@ class DeskPet:
 
     def load_reminders(self):
         try:
-            with open('reminders.json', 'r') as f:
-                return json.load(f)
+            with open(self._data_file("reminders"), 'r') as f:
+                reminders = json.load(f)
         except FileNotFoundError:
             return []
+        occurrences = Counter()
+        for reminder in reminders:
+            if "id" not in reminder:
+                reminder_id = content_reminder_id(reminder)
+                reminder["id"] = content_reminder_id(reminder, occurrences[reminder_id])
+                occurrences[reminder_id] += 1
+        return reminders
 
     def save_reminders(self):
-        with open('reminders.json', 'w') as f:
-            json.dump(self.reminders, f)
+        path = self._data_file("reminders")
+        # Merge any external edit first so this save doesn't overwrite it
+        self.host.watcher.check(path)
+        self._remember_disk_reminders(self.reminders)
+        self.host.writer.write(path, self.reminders)
+
+    def _remember_disk_reminders(self, reminders):
+        """Snapshot of the file's contents, the base for merging external edits"""
+        self._disk_reminders = {reminder['id']: dict(reminder) for reminder in reminders}
+
+    def sync_reminders_from_disk(self):
+        """Apply an external edit of the reminders file as an incremental diff.
+
+        Changes are found by comparing the file with what it last held, so
+        local changes not yet saved are kept. Only if the edit touches the
+        next due reminder is the reminder timer re-armed.
+        """
+        try:
+            on_disk = self.load_reminders()
+        except json.JSONDecodeError as e:
+            print(f"Ignoring unreadable reminders file: {e}")
+            return
+        disk = {reminder['id']: reminder for reminder in on_disk}
+        known = self._disk_reminders
+        current = {reminder['id']: reminder for reminder in self.reminders}
+        affected_dues = []
+        added = changed = removed = 0
+
+        for reminder_id, reminder in disk.items():
+            if reminder_id not in known:
+                if reminder_id not in current:
+                    self.reminders.append(reminder)
+                    affected_dues.append(reminder['due_datetime'])
+                    added += 1
+            elif reminder != known[reminder_id] and reminder_id in current:
+                ours = current[reminder_id]
+                affected_dues += [ours['due_datetime'], reminder['due_datetime']]
+                self._close_reminder_prompt(ours)
+                ours.clear()
+                ours.update(reminder)
+                changed += 1
+
+        for reminder_id in known.keys() - disk.keys():
+            if reminder_id in current:
+                ours = current[reminder_id]
+                affected_dues.append(ours['due_datetime'])
+                self._close_reminder_prompt(ours)
+                self.reminders.remove(ours)
+                removed += 1
+
+        self._disk_reminders = {reminder_id: dict(reminder) for reminder_id, reminder in disk.items()}
+        if not affected_dues:
+            return
+        print(f"Reminders changed on disk: {added} added, {changed} changed, {removed} removed")
+
+        earliest = min(datetime.strptime(due, REMINDER_TIME_FORMAT) for due in affected_dues)
+        if self._reminder_timer_due is None or earliest <= self._reminder_timer_due:
+            self._arm_reminder_timer()
+
+    def is_on_pet(self, event):
+        """Check the event position against the current sprite's hit mask"""
+        mask = self.hit_masks.get(self._current_image_key)
+        if mask is not None and self.compositor.frame_mask is not None:
+            mask = self.compositor.frame_mask  # Animated sprite: test the frame on screen
+        if mask is None:
+            return True  # No mask (e.g. the error label): the whole widget counts
+        # The label centers its image
+        x = event.x - (event.widget.winfo_width() - mask.width) // 2
+        y = event.y - (event.widget.winfo_height() - mask.height) // 2
+        return mask.hit(x, y)
 
     def on_enter(self, event):
         """When mouse enters pet area"""
+        if self.is_on_pet(event):
+            self.start_hover()
+
+    def on_motion(self, event):
+        """Track the pointer crossing between transparent and opaque pixels"""
+        if self._drag_data["pressed"]:
+            return
+        on_pet = self.is_on_pet(event)
+        if on_pet and not self._hovering:
+            self.start_hover()
+        elif not on_pet and self._hovering:
+            self.end_hover()
+
+    def on_leave(self, event):
+        """When mouse leaves pet area"""
+        if self._hovering:
+            self.end_hover()
+
+    def start_hover(self):
+        """Pointer is over the lizard itself"""
+        self._hovering = True
         self.update_pet_state("hover")
         if self.reminders:  # Only show bubble if there are reminders
-            latest = self.reminders[-1]  # Get the most recent reminder
-            self.voice_label.configure(text=latest['text'])
             self.show_voice_bubble()
         self.reset_sleep_timer()
 
-    def on_leave(self, event):
-        """When mouse leaves pet area"""
+    def end_hover(self):
+        """Pointer left the lizard"""
+        self._hovering = False
         if self._current_state != "sleep":
             self.update_pet_state("normal")
         self.hide_voice_bubble()
@@ -370,7 +2252,10 @@ class DeskPet:
         """Delete a specific reminder"""
         if reminder in self.reminders:
             self.reminders.remove(reminder)
+            self.archive.add(reminder, "deleted", self.clock.now())
             self.save_reminders()
+            self._close_reminder_prompt(reminder)
+            self._arm_reminder_timer()
             if self._current_reminder_label:
                 self._current_reminder_label.destroy()
                 self._current_reminder_label = None
@@ -392,6 +2277,19 @@ class DeskPet:
                 text="Toggle Draw Over Windows",
                 command=self.toggle_always_on_top
             ).pack(padx=10, pady=5)
+            
+            theme_frame = ttk.Frame(self._settings_window)
+            theme_frame.pack(padx=10, pady=5)
+            ttk.Label(theme_frame, text="Theme:").pack(side=tk.LEFT)
+            theme_var = tk.StringVar(value=self.settings["theme"] or "none")
+            ttk.OptionMenu(
+                theme_frame,
+                theme_var,
+                theme_var.get(),
+                "none",
+                *THEMES,
+                command=lambda name: self.set_theme(None if name == "none" else name)
+            ).pack(side=tk.LEFT, padx=5)
 
     def toggle_always_on_top(self):
         """Toggle if pet draws over other windows"""
@@ -401,13 +2299,12 @@ class DeskPet:
         if self._current_reminder_label:
             self._current_reminder_label.attributes('-topmost', not current)
 
-    def add_reminder(self):
-        """Create a new reminder with date and time"""
-        if self._reminder_window:
-            self._reminder_window.focus_force()
+    def _build_reminder_dialog(self):
+        """Build the add-reminder dialog once, hidden; add_reminder only shows it"""
+        if self._reminder_window or not self.root.winfo_exists():
             return
-            
         self._reminder_window = tk.Toplevel(self.root)
+        self._reminder_window.withdraw()
         self._reminder_window.title("Add Reminder")
         self._reminder_window.attributes('-topmost', True)
         
@@ -416,24 +2313,23 @@ class DeskPet:
         
         ttk.Label(frame, text="Reminder text:").pack(pady=(0, 5))
         
-        reminder_text = tk.Text(frame, width=40, height=4)
-        reminder_text.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
-        reminder_text.focus()
+        self._reminder_text = tk.Text(frame, width=40, height=4)
+        self._reminder_text.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
         
         ttk.Label(frame, text="Due date and time:").pack(pady=(5, 0))
         
         # Add DateEntry for picking date
-        due_datetime = DateEntry(frame, width=20)
-        due_datetime.pack(pady=5)
+        self._reminder_date = DateEntry(frame, width=20)
+        self._reminder_date.pack(pady=5)
         
         # Add time selection with AM/PM
         time_frame = ttk.Frame(frame)
         time_frame.pack(pady=5)
         
         # Initialize with 12-hour format
-        hour_var = tk.StringVar(value="12")
-        minute_var = tk.StringVar(value="00")
-        ampm_var = tk.StringVar(value="AM")
+        self._reminder_hour = tk.StringVar(value="12")
+        self._reminder_minute = tk.StringVar(value="00")
+        self._reminder_ampm = tk.StringVar(value="AM")
         
         # Hour spinbox (1-12)
         hour_spinbox = ttk.Spinbox(
@@ -442,7 +2338,7 @@ class DeskPet:
             to=12,
             width=2,
             format="%02.0f",
-            textvariable=hour_var
+            textvariable=self._reminder_hour
         )
         hour_spinbox.pack(side=tk.LEFT, padx=2)
         
@@ -455,85 +2351,108 @@ class DeskPet:
             to=59,
             width=2,
             format="%02.0f",
-            textvariable=minute_var
+            textvariable=self._reminder_minute
         )
         minute_spinbox.pack(side=tk.LEFT, padx=2)
         
         # AM/PM toggle
         ampm_menu = ttk.OptionMenu(
             time_frame,
-            ampm_var,
+            self._reminder_ampm,
             "AM",
             "AM",
             "PM"
         )
         ampm_menu.pack(side=tk.LEFT, padx=5)
         
-        def save_and_close(event=None):
-            text = reminder_text.get("1.0", tk.END).strip()
-            if text:
-                # Convert 12-hour to 24-hour format
-                hour = int(hour_var.get())
-                minute = int(minute_var.get())
-                
-                # Adjust hour based on AM/PM
-                if ampm_var.get() == "PM" and hour != 12:
-                    hour += 12
-                elif ampm_var.get() == "AM" and hour == 12:
-                    hour = 0
-                
-                # Combine date and time
-                date = due_datetime.get_date()
-                due = datetime(
-                    date.year,
-                    date.month,
-                    date.day,
-                    hour,
-                    minute
-                )
-                
-                reminder = {
-                    "text": text,
-                    "due_datetime": due.strftime("%Y-%m-%d %H:%M"),
-                    "created_at": datetime.now().strftime("%Y-%m-%d %H:%M")
-                }
-                self.reminders.append(reminder)
-                self.save_reminders()
-                self.show_voice_bubble(text="Reminder set!")
-            
-            if self._reminder_window:
-                self._reminder_window.destroy()
-                self._reminder_window = None
-            
         button_frame = ttk.Frame(frame)
         button_frame.pack(pady=10)
         
         ttk.Button(
             button_frame,
             text="Save",
-            command=save_and_close
+            command=self._save_reminder_dialog
         ).pack(side=tk.LEFT, padx=5)
         
         ttk.Button(
             button_frame,
             text="Cancel",
-            command=lambda: self._reminder_window.destroy()
+            command=self.on_reminder_window_close
         ).pack(side=tk.LEFT, padx=5)
         
         self._reminder_window.protocol(
             "WM_DELETE_WINDOW",
-            lambda: self.on_reminder_window_close()
+            self.on_reminder_window_close
         )
 
+    def add_reminder(self):
+        """Create a new reminder with date and time"""
+        self._build_reminder_dialog()
+        if self._reminder_window.winfo_viewable():
+            self._reminder_window.focus_force()
+            return
+
+        # Reset the fields left over from last time
+        self._reminder_text.delete("1.0", tk.END)
+        self._reminder_date.set_date(self.clock.now().date())
+        self._reminder_hour.set("12")
+        self._reminder_minute.set("00")
+        self._reminder_ampm.set("AM")
+
+        self._reminder_window.deiconify()
+        self._reminder_text.focus()
+
+    def _save_reminder_dialog(self, event=None):
+        """Save the reminder entered in the dialog and hide it"""
+        text = self._reminder_text.get("1.0", tk.END).strip()
+        if text:
+            # Convert 12-hour to 24-hour format
+            hour = int(self._reminder_hour.get())
+            minute = int(self._reminder_minute.get())
+            
+            # Adjust hour based on AM/PM
+            if self._reminder_ampm.get() == "PM" and hour != 12:
+                hour += 12
+            elif self._reminder_ampm.get() == "AM" and hour == 12:
+                hour = 0
+            
+            # Combine date and time
+            date = self._reminder_date.get_date()
+            due = datetime(
+                date.year,
+                date.month,
+                date.day,
+                hour,
+                minute
+            )
+            
+            reminder = {
+                "id": new_reminder_id(),
+                "text": text,
+                "due_datetime": due.strftime(REMINDER_TIME_FORMAT),
+                "created_at": self.clock.now().strftime(REMINDER_TIME_FORMAT)
+            }
+            self.reminders.append(reminder)
+            self.save_reminders()
+            self._arm_reminder_timer()
+            self.show_voice_bubble(text="Reminder set!")
+        
+        self.on_reminder_window_close()
+
     def on_reminder_window_close(self):
         """Handle reminder window closing"""
         if self._reminder_window:
-            self._reminder_window.destroy()
-            self._reminder_window = None
+            self._reminder_window.withdraw()
 
     def show_reminders(self, event):
         """Show all reminders in a window"""
+        if event is not None and not self.is_on_pet(event):
+            return
+        if self._reminders_list_window:
+            # Replace rather than stack up one window per right-click
+            self._reminders_list_window.destroy()
         reminders_window = tk.Toplevel(self.root)
+        self._reminders_list_window = reminders_window
         reminders_window.title("All Reminders")
         reminders_window.attributes('-topmost', True)
         
@@ -544,6 +2463,12 @@ class DeskPet:
         # Add a label
         ttk.Label(frame, text="Your Reminders:").pack(pady=(0, 10))
         
+        ttk.Button(
+            frame,
+            text="History",
+            command=self.show_reminder_history
+        ).pack(side=tk.BOTTOM, pady=(10, 0))
+        
         # Create a frame for the list
         list_frame = ttk.Frame(frame)
         list_frame.pack(fill=tk.BOTH, expand=True)
@@ -555,7 +2480,7 @@ class DeskPet:
             # Convert datetime to 12-hour format
             dt = datetime.strptime(
                 reminder['due_datetime'],
-                "%Y-%m-%d %H:%M"
+                REMINDER_TIME_FORMAT
             )
             hour = dt.hour
             ampm = "AM"
@@ -585,31 +2510,117 @@ class DeskPet:
                 command=lambda r=reminder: self.delete_reminder(r)
             ).pack(side=tk.RIGHT)
 
+    def reminder_history(self, days):
+        """Lines describing reminders archived during the last days, newest first"""
+        start = (self.clock.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        recent = deque(self.archive.records(start), maxlen=self.HISTORY_LIMIT)
+        return [
+            f"{record['archived_at']}  {record['outcome']:<9}  {record['text']}"
+            for record in reversed(recent)
+        ]
+
+    def show_reminder_history(self):
+        """Show dismissed and deleted reminders, read from the archive"""
+        if self._history_window:
+            self._history_window.destroy()
+        history_window = tk.Toplevel(self.root)
+        self._history_window = history_window
+        history_window.title("Reminder History")
+        history_window.attributes('-topmost', True)
+        
+        frame = ttk.Frame(history_window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(
+            frame,
+            text=f"Done in the last {self.HISTORY_DAYS} days:"
+        ).pack(pady=(0, 10))
+        
+        lines = self.reminder_history(self.HISTORY_DAYS)
+        listbox = tk.Listbox(frame, width=60, height=min(max(len(lines), 1), 15))
+        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(frame, command=listbox.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.insert(tk.END, *(lines or ["Nothing archived yet"]))
+
     def check_reminders(self):
         """Check for due reminders"""
-        current_time = datetime.now()
+        self._reminder_timer = None
+        current_time = self.clock.now()
         # Use slice copy to allow modification during iteration
         for reminder in self.reminders[:]:
+            if reminder['id'] in self._reminder_prompts:
+                continue  # Already waiting on the user
             reminder_time = datetime.strptime(
                 reminder['due_datetime'],
-                "%Y-%m-%d %H:%M"
+                REMINDER_TIME_FORMAT
             )
             if current_time >= reminder_time:
                 self.show_notification(f"REMINDER: {reminder['text']}")
                 # Ask if user wants to dismiss or snooze
                 self.show_reminder_actions(reminder)
         
-        # Check again in 30 seconds
-        self.root.after(30000, self.check_reminders)
+        self._arm_reminder_timer()
+
+    def _arm_reminder_timer(self):
+        """Schedule a single wakeup for the next reminder that is due"""
+        if self._reminder_timer:
+            self.scheduler.cancel(self._reminder_timer)
+            self._reminder_timer = None
+        self._reminder_timer_due = None
+
+        pending = [
+            datetime.strptime(reminder['due_datetime'], REMINDER_TIME_FORMAT)
+            for reminder in self.reminders
+            if reminder['id'] not in self._reminder_prompts
+        ]
+        if not pending:
+            return
+        self._reminder_timer_due = min(pending)
+        wait = (self._reminder_timer_due - self.clock.now()).total_seconds()
+        wait = min(max(wait, 0), self.REMINDER_MAX_WAIT)
+        self._reminder_timer = self.scheduler.schedule(math.ceil(wait * 1000), self.check_reminders)
+
+    def _close_reminder_prompt(self, reminder):
+        """Close the action window for a reminder, if one is open"""
+        window = self._reminder_prompts.pop(reminder['id'], None)
+        if window:
+            window.destroy()
+
+    def _defer_reminder_prompt(self, reminder):
+        """Closed without an answer: ask again after a short delay"""
+        self._close_reminder_prompt(reminder)
+        self._reminder_prompts[reminder['id']] = None
+
+        def reprompt():
+            self._reprompt_timers.pop(reminder['id'], None)
+            if self._reminder_prompts.get(reminder['id'], False) is None:
+                del self._reminder_prompts[reminder['id']]
+            self._arm_reminder_timer()
+        if reminder['id'] in self._reprompt_timers:
+            self.scheduler.cancel(self._reprompt_timers[reminder['id']])
+        self._reprompt_timers[reminder['id']] = self.scheduler.schedule(
+            self.REMINDER_REPROMPT_DELAY,
+            reprompt
+        )
 
     def show_notification(self, message):
         notification = tk.Toplevel(self.root)
         notification.attributes('-topmost', True)
         ttk.Label(notification, text=message).pack()
-        notification.after(5000, notification.destroy)  # Close after 5 seconds
+
+        def close_notification():
+            self._notification_timers.discard(timer)
+            notification.destroy()
+        timer = self.scheduler.schedule(5000, close_notification)  # Close after 5 seconds
+        self._notification_timers.add(timer)
 
     def on_drag_start(self, event):
         """Begin drag of the pet"""
+        if not self.is_on_pet(event):
+            return  # Clicked a transparent pixel
+        self._drag_data["pressed"] = True
         self._drag_data["x"] = event.x
         self._drag_data["y"] = event.y
         self._drag_data["dragging"] = False
@@ -621,6 +2632,8 @@ class DeskPet:
 
     def on_drag_motion(self, event):
         """Handle dragging of the pet"""
+        if not self._drag_data["pressed"]:
+            return
         if self._drag_data["dragging"]:
             x = self.root.winfo_x() + (event.x - self._drag_data["x"])
             y = self.root.winfo_y() + (event.y - self._drag_data["y"])
@@ -634,9 +2647,7 @@ class DeskPet:
             
             # Move voice bubble if visible
             if self.voice_bubble.winfo_viewable():
-                bubble_x = x + 180
-                bubble_y = y + 40
-                self.voice_bubble.geometry(f'+{bubble_x}+{bubble_y}')
+                self.voice_bubble.geometry(self._bubble_geometry(x, y))
         else:
             # Start dragging if moved more than 5 pixels
             dx = abs(event.x - self._drag_data["x"])
@@ -646,18 +2657,37 @@ class DeskPet:
 
     def on_drag_stop(self, event):
         """End drag of the pet"""
+        self._drag_data["pressed"] = False
         self._drag_data["dragging"] = False
 
     def update_pet_state(self, state):
         """Update the pet's image based on its state"""
         if state != self._current_state and state in self.pet_images:
+            previous_key = self._current_image_key
+            waking = self._current_state == "sleep"
             self._current_state = state
-            self.pet_label.configure(image=self.pet_images[state])
+            self._current_image_key = state
+            if waking:
+                # Whatever woke the pet, leave idle mode before drawing
+                self.exit_idle_mode()
+                self.start_sleep_timer()
+
+            # Cross-fade between states, but not while idling
+            transition = None
+            if not self._idle and previous_key in self._sprite_keys:
+                transition = self.host.sprites.transition(
+                    self._sprite_keys[previous_key],
+                    self._sprite_keys[state]
+                )
+            self.compositor.set_body(
+                self.pet_images[state],
+                transition,
+                animation=self._animations.get(state)
+            )
+            self.compositor.show_sleep_overlay(state == "sleep")
             
             # Show/hide voice bubble based on state
             if state == "hover" and self.reminders:
-                latest = self.reminders[-1]  # Get the most recent reminder
-                self.voice_label.configure(text=latest['text'])
                 self.show_voice_bubble()
             elif state != "hover":
                 self.hide_voice_bubble()
@@ -671,14 +2701,21 @@ class DeskPet:
         else:
             return  # Don't show bubble if no text and no reminders
             
-        self.voice_label.configure(text=bubble_text)
+        self._bubble_image = self.bubble_renderer.render(bubble_text)
+        self.bubble_label.configure(image=self._bubble_image)
         
         # Position the bubble to the right of the pet
-        x = self.root.winfo_x() + 180
-        y = self.root.winfo_y() + 40
-        self.voice_bubble.geometry(f'+{x}+{y}')
+        self.voice_bubble.geometry(
+            self._bubble_geometry(self.root.winfo_x(), self.root.winfo_y())
+        )
         self.voice_bubble.deiconify()
 
+    def _bubble_geometry(self, pet_x, pet_y):
+        """Place the bubble so its tail stays next to the pet whatever its height"""
+        offset_x, offset_y = self.BUBBLE_OFFSET
+        height = self._bubble_image.height() if self._bubble_image else 0
+        return f'+{pet_x + offset_x}+{pet_y + offset_y - height}'
+
     def hide_voice_bubble(self):
         """Hide the voice bubble"""
         self.voice_bubble.withdraw()
@@ -686,17 +2723,17 @@ class DeskPet:
     def start_sleep_timer(self):
         """Start the timer to put the pet to sleep"""
         if self._sleep_timer:
-            self.root.after_cancel(self._sleep_timer)
+            self.scheduler.cancel(self._sleep_timer)
         # Set timer for 30 seconds
-        self._sleep_timer = self.root.after(
-            30000,
+        self._sleep_timer = self.scheduler.schedule(
+            self.SLEEP_DELAY,
             self.sleep_pet
         )
 
     def reset_sleep_timer(self):
         """Reset the sleep timer"""
         if self._sleep_timer:
-            self.root.after_cancel(self._sleep_timer)
+            self.scheduler.cancel(self._sleep_timer)
             self._sleep_timer = None
         if self._current_state == "sleep":
             self.update_pet_state("normal")
@@ -704,26 +2741,80 @@ class DeskPet:
 
     def sleep_pet(self):
         """Put the pet to sleep"""
+        self._sleep_timer = None
         self.update_pet_state("sleep")
         self.hide_voice_bubble()
+        if self._current_state == "sleep":  # Not without a sleep sprite
+            self.enter_idle_mode()
 
     def load_stats(self):
         """Load Pomodoro statistics"""
         try:
-            with open("pomodoro_stats.json", "r") as f:
+            with open(self._data_file("pomodoro_stats"), "r") as f:
                 return json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
-            return {
-                "total_work_sessions": 0,
-                "total_work_minutes": 0,
-                "total_break_minutes": 0,
-                "daily_sessions": {}
-            }
+            return self.empty_stats()
+
+    @staticmethod
+    def empty_stats():
+        return {
+            "total_work_sessions": 0,
+            "total_work_minutes": 0,
+            "total_break_minutes": 0,
+            "daily_sessions": {},
+            "hourly_sessions": [0] * 24  # completed work sessions by hour of day
+        }
 
     def save_stats(self):
         """Save Pomodoro statistics"""
-        with open("pomodoro_stats.json", "w") as f:
-            json.dump(self.stats, f)
+        path = self._data_file("pomodoro_stats")
+        self.host.watcher.check(path)
+        self._remember_disk_stats(self.stats)
+        self.host.writer.write(path, self.stats)
+
+    def _remember_disk_stats(self, stats):
+        """Snapshot of the stats file's contents, the base for merging external edits"""
+        self._disk_stats = json.loads(json.dumps(stats))
+
+    def sync_stats_from_disk(self):
+        """Apply an external edit of the stats file as a diff.
+
+        Counters move by however much the file's copy changed since we last
+        wrote or read it, so sessions counted here but not yet saved stay.
+        """
+        try:
+            with open(self._data_file("pomodoro_stats"), "r") as f:
+                on_disk = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable stats file: {e}")
+            return
+        base = self._disk_stats
+        for key, value in on_disk.items():
+            before = base.get(key)
+            if value == before:
+                continue
+            if key == "daily_sessions" and isinstance(value, dict):
+                days = self.stats.setdefault(key, {})
+                before = before if isinstance(before, dict) else {}
+                for day in set(value) | set(before):
+                    count = days.get(day, 0) + value.get(day, 0) - before.get(day, 0)
+                    if count > 0:
+                        days[day] = count
+                    else:
+                        days.pop(day, None)
+            elif key == "hourly_sessions" and isinstance(value, list):
+                hours = self.stats.setdefault(key, [0] * 24)
+                before = before if isinstance(before, list) else []
+                for hour in range(min(len(hours), len(value))):
+                    previous = before[hour] if hour < len(before) else 0
+                    hours[hour] = max(0, hours[hour] + value[hour] - previous)
+            elif isinstance(value, int) and isinstance(before, int) \
+                    and isinstance(self.stats.get(key), int):
+                self.stats[key] += value - before
+            else:
+                self.stats[key] = value
+        self._remember_disk_stats(on_disk)
+        self._stats_revision += 1
 
     def start_pomodoro(self):
         """Start a Pomodoro session"""
@@ -731,42 +2822,67 @@ class DeskPet:
             self._pomodoro_active = True
             self._pomodoro_state = "work"
             self._pomodoro_time_left = self.POMODORO_WORK * 60
+            self._pomodoro_deadline = self.clock.now() + timedelta(seconds=self._pomodoro_time_left)
             self._pomodoro_sessions = 0
             self.update_pomodoro_timer()
+            self.apply_theme()
             self.update_pet_state("work")
             self.show_notification("Pomodoro started! Time to focus!")
 
     def update_pomodoro_timer(self):
         """Update Pomodoro timer"""
+        self._pomodoro_timer = None
         if not self._pomodoro_active:
             return
 
+        # Count down against a deadline so skipped ticks don't drift
+        remaining = (self._pomodoro_deadline - self.clock.now()).total_seconds()
+        self._pomodoro_time_left = max(0, math.ceil(remaining))
+
         if self._pomodoro_time_left > 0:
-            # Update display and decrement timer
+            if self._idle:
+                # Nobody is watching: show the end time and wake once at the boundary
+                self.show_timer_deadline(self._pomodoro_state, self._pomodoro_deadline)
+                self._pomodoro_timer = self.scheduler.schedule(
+                    math.ceil(remaining * 1000),
+                    self.update_pomodoro_timer
+                )
+                return
+
             self.update_timer_display(
                 self._pomodoro_state,
                 self._pomodoro_time_left
             )
-            self._pomodoro_time_left -= 1
-            # Schedule next update in 1 second
-            self._pomodoro_timer = self.root.after(
-                1000,
+            # Schedule next update on the next whole second
+            self._pomodoro_timer = self.scheduler.schedule(
+                math.ceil((remaining - self._pomodoro_time_left + 1) * 1000),
                 self.update_pomodoro_timer
             )
         else:
             self.handle_pomodoro_completion()
 
+    def _record_interval(self, end):
+        """Mark the current Pomodoro interval, up to end, in the focus log"""
+        duration = timedelta(seconds=self._pomodoro_duration(self._pomodoro_state))
+        start = self._pomodoro_deadline - duration
+        kind = "focus" if self._pomodoro_state == "work" else "break"
+        self.focus_log.mark(kind, start, min(end, self._pomodoro_deadline))
+
     def handle_pomodoro_completion(self):
         """Handle completion of a Pomodoro interval"""
+        self._record_interval(self._pomodoro_deadline)
         if self._pomodoro_state == "work":
             self._pomodoro_sessions += 1
             self.stats["total_work_sessions"] += 1
             self.stats["total_work_minutes"] += self.POMODORO_WORK
             
-            today = datetime.now().strftime("%Y-%m-%d")
+            today = self.clock.now().strftime("%Y-%m-%d")
             if today not in self.stats["daily_sessions"]:
                 self.stats["daily_sessions"][today] = 0
             self.stats["daily_sessions"][today] += 1
+            hourly = self.stats.setdefault("hourly_sessions", [0] * 24)
+            hourly[self.clock.now().hour] += 1
+            self._stats_revision += 1
             
             if self._pomodoro_sessions % 4 == 0:
                 self._pomodoro_state = "long_break"
@@ -781,6 +2897,8 @@ class DeskPet:
             self._pomodoro_time_left = self.POMODORO_WORK * 60
             self.show_notification("Break's over! Back to work!")
         
+        self._pomodoro_deadline = self.clock.now() + timedelta(seconds=self._pomodoro_time_left)
+        self.apply_theme()
         self.update_pet_state(self._pomodoro_state)
         self.save_stats()
         self.update_pomodoro_timer()
@@ -788,10 +2906,15 @@ class DeskPet:
     def stop_pomodoro(self):
         """Stop the Pomodoro timer"""
         if self._pomodoro_active:
+            # Keep the part of the interval that did happen
+            self._record_interval(self.clock.now())
             self._pomodoro_active = False
             if self._pomodoro_timer:
-                self.root.after_cancel(self._pomodoro_timer)
+                self.scheduler.cancel(self._pomodoro_timer)
+                self._pomodoro_timer = None
             self.timer_window.withdraw()
+            self.compositor.show_pomodoro_ring(None)
+            self.apply_theme()
             self.update_pet_state("normal")
             self.show_notification("Pomodoro session ended!")
 
@@ -814,38 +2937,53 @@ class DeskPet:
         button_frame = ttk.Frame(frame)
         button_frame.pack(pady=10)
         
-        def snooze_reminder():
-            # Snooze for 5 minutes
-            new_time = datetime.now() + timedelta(minutes=5)
-            reminder['due_datetime'] = new_time.strftime("%Y-%m-%d %H:%M")
-            self.save_reminders()
-            action_window.destroy()
-            self.show_notification("Reminder snoozed for 5 minutes")
-        
-        def dismiss_reminder():
-            self.reminders.remove(reminder)
-            self.save_reminders()
-            action_window.destroy()
-        
+        self._reminder_prompts[reminder['id']] = action_window
+        action_window.protocol(
+            "WM_DELETE_WINDOW",
+            lambda: self._defer_reminder_prompt(reminder)
+        )
+
         ttk.Button(
             button_frame,
             text="Snooze (5 min)",
-            command=snooze_reminder
+            command=lambda: self.snooze_reminder(reminder)
         ).pack(side=tk.LEFT, padx=5)
         
         ttk.Button(
             button_frame,
             text="Dismiss",
-            command=dismiss_reminder
+            command=lambda: self.dismiss_reminder(reminder)
         ).pack(side=tk.LEFT, padx=5)
 
-    def show_stats(self):
-        """Show Pomodoro statistics"""
-        stats_window = tk.Toplevel(self.root)
-        stats_window.title("Pomodoro Stats")
-        stats_window.attributes('-topmost', True)
+    def snooze_reminder(self, reminder):
+        """Push a due reminder back by 5 minutes"""
+        new_time = self.clock.now() + timedelta(minutes=5)
+        reminder['due_datetime'] = new_time.strftime(REMINDER_TIME_FORMAT)
+        self.save_reminders()
+        self._close_reminder_prompt(reminder)
+        self._arm_reminder_timer()
+        self.show_notification("Reminder snoozed for 5 minutes")
+
+    def dismiss_reminder(self, reminder):
+        """Drop a due reminder"""
+        if reminder in self.reminders:
+            self.reminders.remove(reminder)
+            self.archive.add(reminder, "dismissed", self.clock.now())
+        self.save_reminders()
+        self._close_reminder_prompt(reminder)
+        self._arm_reminder_timer()
+
+    def _build_stats_dialog(self):
+        """Build the stats window once, hidden; show_stats fills it in"""
+        if self._stats_window or not self.root.winfo_exists():
+            return
+        self._stats_window = tk.Toplevel(self.root)
+        self._stats_window.withdraw()
+        self._stats_window.title("Pomodoro Stats")
+        self._stats_window.attributes('-topmost', True)
+        self._stats_window.protocol("WM_DELETE_WINDOW", self._stats_window.withdraw)
         
-        frame = ttk.Frame(stats_window, padding="10")
+        frame = ttk.Frame(self._stats_window, padding="10")
         frame.pack(fill=tk.BOTH, expand=True)
         
         ttk.Label(
@@ -854,9 +2992,44 @@ class DeskPet:
             font=('Arial', 14, 'bold')
         ).pack(pady=10)
         
+        self._stats_label = ttk.Label(frame, text="")
+        self._stats_label.pack(pady=10)
+        
+        self._stats_chart_label = ttk.Label(frame)
+        self._stats_chart_label.pack(pady=5)
+        
+        ttk.Button(
+            frame,
+            text="Close",
+            command=self._stats_window.withdraw
+        ).pack(pady=10)
+
+    def _prewarm_dialogs(self):
+        """Build the slow dialogs while idle so opening them later is instant"""
+        self._build_reminder_dialog()
+        # Yield to the event loop between the two
+        self.root.after_idle(self._update_stats_window)
+
+    def show_stats(self):
+        """Show Pomodoro statistics"""
+        self._update_stats_window()
+        self._stats_window.deiconify()
+        self._stats_window.lift()
+
+    def _update_stats_window(self):
+        """Fill the (hidden) stats window with the current numbers and chart"""
+        self._build_stats_dialog()
+        if not self._stats_window:
+            return
+        
         # Get today's date for stats
-        today = datetime.now().strftime("%Y-%m-%d")
+        now = self.clock.now()
+        today = now.strftime("%Y-%m-%d")
         today_sessions = self.stats['daily_sessions'].get(today, 0)
+        midnight = datetime.combine(now.date(), datetime.min.time())
+        focused_today = self.focus_log.minutes("focus", midnight, now)
+        best_hour = self.focus_log.most_productive_hour()
+        best_hour_text = f"{best_hour:02d}:00" if best_hour is not None else "-"
         
         stats_text = f"""
 Total Work Sessions: {self.stats['total_work_sessions']}
@@ -864,14 +3037,13 @@ Total Work Minutes: {self.stats['total_work_minutes']}
 Total Break Minutes: {self.stats['total_break_minutes']}
 
 Today's Sessions: {today_sessions}
+Focused Today: {focused_today} min
+Most Productive Hour: {best_hour_text}
 """
-        ttk.Label(frame, text=stats_text).pack(pady=10)
-        
-        ttk.Button(
-            frame,
-            text="Close",
-            command=stats_window.destroy
-        ).pack(pady=10)
+        self._stats_label.configure(text=stats_text)
+        self._stats_chart_label.configure(
+            image=self.stats_chart.render(self.stats, now.date(), self._stats_revision)
+        )
 
     def update_timer_display(self, state, time_left):
         """Update the timer window with current state and time"""
@@ -882,6 +3054,7 @@ Today's Sessions: {today_sessions}
         mins, secs = divmod(time_left, 60)
         timer_text = f"{state.title()}\n{mins:02d}:{secs:02d}"
         self.timer_label.configure(text=timer_text)
+        self.compositor.show_pomodoro_ring(state, 1 - time_left / self._pomodoro_duration(state))
         
         # Position timer above the pet
         x = self.root.winfo_x() + 50
@@ -889,6 +3062,27 @@ Today's Sessions: {today_sessions}
         self.timer_window.geometry(f'+{x}+{y}')
         self.timer_window.deiconify()
 
+    def _pomodoro_duration(self, state):
+        """Length of a Pomodoro interval in seconds"""
+        minutes = {
+            "work": self.POMODORO_WORK,
+            "break": self.POMODORO_BREAK,
+            "long_break": self.POMODORO_LONG_BREAK
+        }[state]
+        return minutes * 60
+
+    def show_timer_deadline(self, state, deadline):
+        """Show when the interval ends instead of a live countdown (idle mode)"""
+        self.timer_label.configure(text=f"{state.title()}\nuntil {deadline.strftime('%H:%M')}")
+        self.compositor.show_pomodoro_ring(
+            state,
+            1 - self._pomodoro_time_left / self._pomodoro_duration(state)
+        )
+        x = self.root.winfo_x() + 50
+        y = self.root.winfo_y() - 50
+        self.timer_window.geometry(f'+{x}+{y}')
+        self.timer_window.deiconify()
+
     def create_popup_menu(self):
         """Create the popup menu with all controls"""
         self.popup = tk.Toplevel(self.root)
@@ -922,7 +3116,7 @@ Today's Sessions: {today_sessions}
         self.walk_btn.pack(side=tk.LEFT, padx=5, pady=5)
 
         self.close_btn = ttk.Button(button_frame, text="❌", width=3,
-            command=self.cleanup_and_exit)
+            command=self.close)
         self.close_btn.pack(side=tk.LEFT, padx=5, pady=5)
 
     def toggle_pomodoro(self):
@@ -937,6 +3131,7 @@ Today's Sessions: {today_sessions}
     def toggle_walking(self):
         """Toggle the walking animation"""
         self._walking = not self._walking
+        self._resume_walking = False
         if self._walking:
             self.start_walking()
         else:
@@ -956,14 +3151,18 @@ Today's Sessions: {today_sessions}
     def stop_walking(self):
         """Stop the walking animation"""
         if self._walk_timer:
-            self.root.after_cancel(self._walk_timer)
+            self.scheduler.cancel(self._walk_timer)
             self._walk_timer = None
         self.update_pet_state("normal")
 
     def update_walking(self):
         """Update the walking animation"""
+        self._walk_timer = None
         if not self._walking:
             return
+        if self._idle:
+            self._resume_walking = True
+            return
 
         # Get screen dimensions
         screen_width = self.root.winfo_screenwidth()
@@ -987,33 +3186,430 @@ Today's Sessions: {today_sessions}
         frame_key = f"walk{self._walk_frame}"
         if self._walk_direction < 0:
             frame_key += "_flipped"
-        self.pet_label.configure(image=self.pet_images[frame_key])
-        self.pet_label.image = self.pet_images[frame_key]
+        self._current_image_key = frame_key
+        if frame_key in self.pet_images:
+            self.compositor.set_body(
+                self.pet_images[frame_key],
+                animation=self._animations.get(frame_key)
+            )
 
         # Schedule next update
-        self._walk_timer = self.root.after(self.WALK_FRAME_DELAY, self.update_walking)
+        self._walk_timer = self.scheduler.schedule(self.WALK_FRAME_DELAY, self.update_walking)
+
+
+class PetHost:
+    """Owns the Tk root and everything the pets in this process share:
+    the instance channel, sprite cache, scheduler and persistence writer.
+    Each pet only adds its own windows, reminders and Pomodoro.
+    """
+    PET_SPACING = 220  # pixels between pets along the bottom of the screen
+
+    def __init__(self, clock=None, scheduler=None, listen=True, persist=True):
+        self.root = tk.Tk()
+        self.root.withdraw()  # Pets draw in their own toplevels
+        print("Tkinter root created")
+
+        self.clock = clock or SystemClock()
+        self.scheduler = scheduler or Scheduler(self.root, self.clock)
+
+        # Own the single-instance channel; later launches forward to us
+        self.channel = InstanceChannel()
+        if listen:
+            self.channel.listen(self.root, self.scheduler, self.handle_forwarded_command)
+            print("Instance channel listening")
+
+        self.sprites = SpriteCache()
+        self.watcher = DataFileWatcher(self.root, self.scheduler)
+        self.writer = PersistenceWriter(self.root, persist, on_written=self.watcher.note_written)
+        self.pets = {}  # name -> DeskPet
+        self.tcl_calls = {"issued": 0, "suppressed": 0}  # counted by WidgetMirror
+
+    def add_pet(self, name=DEFAULT_PET):
+        """Start a pet and place it next to the ones already running"""
+        pet = DeskPet(self, name)
+        print("Positioning window...")
+        # Position the pet at the bottom right of the screen
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
+        print(f"Screen dimensions: {screen_width}x{screen_height}")
+        x = screen_width - 250 - self.PET_SPACING * len(self.pets)
+        pet.root.geometry(f'+{max(x, 0)}+{screen_height-250}')
+        self.pets[name] = pet
+        return pet
+
+    def remove_pet(self, name):
+        """Forget a closed pet; exit once none are left"""
+        self.pets.pop(name, None)
+        if not self.pets:
+            self.exit()
+        self.update_idle()
+
+    def update_idle(self):
+        """Slow background polling down while every pet is idle"""
+        idle = bool(self.pets) and all(pet._idle for pet in self.pets.values())
+        self.watcher.set_idle(idle)
+
+    def handle_forwarded_command(self, argv, stdin_text):
+        """Handle arguments forwarded by a second launch"""
+        try:
+            args = build_arg_parser().parse_args(argv)
+        except SystemExit:
+            return "Invalid arguments"
+        return self.handle_command(args, stdin_text)
+
+    def handle_command(self, args, stdin_text=""):
+        """Route a command to the named pets, starting any that aren't running"""
+        replies = []
+        names = args.pet or [next(iter(self.pets), DEFAULT_PET)]
+        for name in names:
+            # Names end up in data file names
+            if not name.replace("-", "").replace("_", "").isalnum():
+                return f"Invalid pet name: {name!r}"
+            if name not in self.pets:
+                self.add_pet(name)
+                replies.append(f"Started pet {name!r}")
+
+        # Session-wide state applies to every pet
+        if args.display_locked:
+            for pet in self.pets.values():
+                pet.set_display_locked(True)
+            replies.append("Idle mode on")
+        elif args.display_unlocked:
+            for pet in self.pets.values():
+                pet.set_display_locked(False)
+            replies.append("Display unlocked")
+
+        if args.wakeups:
+            replies.append(
+                f"{self.scheduler.wakeups_per_minute()} timer wakeups in the last minute"
+            )
+            replies.append(
+                f"{self.tcl_calls['issued']} widget calls issued, "
+                f"{self.tcl_calls['suppressed']} suppressed as no-ops"
+            )
+
+        for name in names:
+            reply = self.pets[name].handle_command(args, stdin_text)
+            if reply:
+                replies.append(reply)
+        return "\n".join(replies)
 
     def run(self):
         try:
-            print("Positioning window...")
-            # Position the pet at the bottom right of the screen
-            screen_width = self.root.winfo_screenwidth()
-            screen_height = self.root.winfo_screenheight()
-            print(f"Screen dimensions: {screen_width}x{screen_height}")
-            self.root.geometry(f'+{screen_width-250}+{screen_height-250}')
             print("Starting main loop...")
             self.root.mainloop()
         except Exception as e:
             print(f"Error during run: {e}")
         finally:
-            self.cleanup_and_exit()
+            self.exit()
+
+    def exit(self):
+        """Flush pending saves and shut the whole process down"""
+        try:
+            self.writer.flush()
+            self.watcher.close()
+            self.channel.close()
+            if self.root:
+                root, self.root = self.root, None
+                root.quit()
+                root.destroy()
+        except Exception as e:
+            print(f"Error during cleanup: {e}")
+        finally:
+            sys.exit(0)
+
+
+def scripted_day_trace(days=1):
+    """A synthetic workday: Pomodoros, hovers, and a reminder that gets snoozed"""
+    events = []
+    for day in range(days):
+        base = day * 24 * 3600
+        events.append({"at": base, "event": "add_reminder", "text": "Standup", "due": "10:30"})
+        events.append({"at": base + 3600, "event": "start_pomodoro"})
+        # Glance at the pet every 20 minutes through the working day
+        for minute in range(60, 9 * 60, 20):
+            events.append({"at": base + minute * 60, "event": "hover"})
+            events.append({"at": base + minute * 60 + 5, "event": "leave"})
+        events.append({"at": base + 2.5 * 3600 + 30, "event": "snooze"})
+        events.append({"at": base + 2.5 * 3600 + 6 * 60, "event": "dismiss"})
+        events.append({"at": base + 4 * 3600, "event": "stop_pomodoro"})
+        events.append({"at": base + 5 * 3600, "event": "start_pomodoro"})
+        events.append({"at": base + 9 * 3600, "event": "stop_pomodoro"})
+    return {"start": "2024-01-01 08:00", "end": days * 24 * 3600, "events": events}
+
+
+class ReplayHarness:
+    """Replays an event trace against one pet on a virtual clock.
+
+    A trace is {"start": "YYYY-MM-DD HH:MM", "end": seconds (optional),
+    "events": [{"at": seconds, "event": name, ...}]}. Timers fire as fast
+    as the CPU allows, so a day of Pomodoros, snoozes and reminders takes
+    seconds. Needs a display, though the pet's windows stay hidden.
+    """
+
+    def __init__(self, trace):
+        start = datetime.strptime(trace["start"], REMINDER_TIME_FORMAT)
+        self.events = sorted(trace["events"], key=lambda event: event["at"])
+        self.end = trace.get("end", self.events[-1]["at"] if self.events else 0)
+        self.clock = VirtualClock(start)
+        self.host = PetHost(
+            clock=self.clock,
+            scheduler=VirtualScheduler(self.clock),
+            listen=False,
+            persist=False
+        )
+        self.pet = self.host.add_pet("replay")
+        self.pet.root.withdraw()
+        # Start from a clean slate rather than whatever is on disk
+        self.pet.reminders = []
+        self.pet.stats = DeskPet.empty_stats()
+        self.ignored = 0
+
+    def _dispatch(self, event):
+        pet = self.pet
+        name = event["event"]
+        if name == "hover":
+            pet.start_hover()
+        elif name == "leave":
+            pet.end_hover()
+        elif name == "start_pomodoro":
+            pet.start_pomodoro()
+        elif name == "stop_pomodoro":
+            pet.stop_pomodoro()
+        elif name == "toggle_walking":
+            pet.toggle_walking()
+        elif name == "add_reminder":
+            due = event["due"]
+            if len(due) == 5:  # Bare HH:MM means today
+                due = f"{self.clock.now():%Y-%m-%d} {due}"
+            pet.reminders.extend(parse_reminder_lines(f"{due} {event['text']}", self.clock.now()))
+            pet._arm_reminder_timer()
+        elif name in ("snooze", "dismiss"):
+            prompted = [r for r in pet.reminders if pet._reminder_prompts.get(r['id'])]
+            if not prompted:
+                self.ignored += 1
+                return
+            if name == "snooze":
+                pet.snooze_reminder(prompted[0])
+            else:
+                pet.dismiss_reminder(prompted[0])
+        else:
+            raise ValueError(f"Unknown trace event: {name!r}")
+
+    def run(self):
+        """Replay the whole trace and return a report"""
+        scheduler = self.host.scheduler
+        wall_start = time.perf_counter()
+        for event in self.events:
+            scheduler.run_until(event["at"])
+            self._dispatch(event)
+        scheduler.run_until(self.end)
+        wall = time.perf_counter() - wall_start
+
+        processed = len(self.events) + scheduler.fired
+        pet = self.pet
+        return {
+            "simulated_seconds": self.end,
+            "wall_seconds": round(wall, 3),
+            "trace_events": len(self.events),
+            "ignored_events": self.ignored,
+            "timer_events": scheduler.fired,
+            "events_per_second": round(processed / wall) if wall else None,
+            "widget_calls": dict(self.host.tcl_calls),
+            "final_state": {
+                "clock": self.clock.now().strftime(REMINDER_TIME_FORMAT),
+                "pet_state": pet._current_state,
+                "idle": pet._idle,
+                "pomodoro": pet._pomodoro_state if pet._pomodoro_active else "inactive",
+                "pending_reminders": [r["text"] for r in pet.reminders],
+                "stats": pet.stats
+            }
+        }
+
+
+class SoakTest(ReplayHarness):
+    """Drives a hidden pet through many simulated usage cycles.
+
+    Each cycle hovers, walks, runs a full Pomodoro and fires, snoozes and
+    dismisses a reminder, opens the reminder and stats windows and then
+    lets the pet fall asleep. The test samples traced Python memory, the
+    Tk widget count and the number of live images, and fails if any keeps
+    growing once caches have warmed up, or if the sleeping pet with
+    nothing due still wakes up, the instance channel included.
+    """
+    WARMUP = 0.25  # fraction of samples ignored while caches fill
+    MEMORY_TOLERANCE = 512 * 1024  # bytes of noise allowed after warm-up
+    IDLE_WAKEUP_LIMIT = 0  # wakeups per minute allowed while asleep with nothing due
+
+    def __init__(self, cycles, samples=20):
+        super().__init__({"start": "2024-01-01 08:00", "events": []})
+        self.cycles = cycles
+        self.sample_every = max(1, cycles // samples)
+        self.samples = []  # (cycle, memory bytes, widgets, images)
+        self.idle_wakeups = 0  # most wakeups in a minute of sleep, over all cycles
+        # Listen on a private channel so its wakeups count against sleep too
+        self._channel_dir = tempfile.mkdtemp(prefix="deskpet-soak-")
+        self.host.channel = InstanceChannel(self._channel_dir)
+        self.host.channel.listen(self.host.root, self.host.scheduler, self.host.handle_forwarded_command)
+
+    def _advance(self, seconds):
+        self.host.scheduler.run_until(self.clock.monotonic() + seconds)
+
+    def _cycle(self, n):
+        pet = self.pet
+        pet.start_hover()
+        self._advance(2)
+        pet.end_hover()
+        self._advance(1)
+
+        pet.toggle_walking()
+        self._advance(2)
+        pet.toggle_walking()
+
+        pet.start_pomodoro()
+        self._advance((pet.POMODORO_WORK + pet.POMODORO_BREAK) * 60 + 5)
+        pet.stop_pomodoro()
+
+        due = self.clock.now() + timedelta(minutes=2)
+        pet.reminders.extend(parse_reminder_lines(
+            f"{due.strftime(REMINDER_TIME_FORMAT)} Soak reminder {n}",
+            self.clock.now()
+        ))
+        pet._arm_reminder_timer()
+        self._advance(3 * 60)
+        for reminder in pet.reminders[:]:
+            pet.snooze_reminder(reminder)
+        self._advance(6 * 60)
+        for reminder in pet.reminders[:]:
+            pet.dismiss_reminder(reminder)
+
+        pet.show_reminders(None)
+        pet.show_stats()
+        self._advance(10)
+
+        # Fall asleep; the last minute of sleep must not wake anything
+        pet.reset_sleep_timer()
+        self._advance(pet.SLEEP_DELAY / 1000 + 120)
+        self.idle_wakeups = max(self.idle_wakeups, self.host.scheduler.wakeups_per_minute())
+        pet.start_hover()
+        pet.end_hover()
+
+    def _count_widgets(self, widget):
+        return 1 + sum(self._count_widgets(child) for child in widget.winfo_children())
+
+    def _sample(self, cycle):
+        self.samples.append((
+            cycle,
+            tracemalloc.get_traced_memory()[0],
+            self._count_widgets(self.host.root),
+            len(self.host.root.image_names())
+        ))
+
+    @staticmethod
+    def _keeps_growing(values, tolerance):
+        """True if the later half of the samples peaks above the earlier half"""
+        half = len(values) // 2
+        return half > 0 and max(values[half:]) > max(values[:half]) + tolerance
+
+    def run(self):
+        """Run every cycle and return (passed, report lines)"""
+        tracemalloc.start()
+        baseline = None
+        warmup_cycles = int(self.cycles * self.WARMUP)
+        wall_start = time.perf_counter()
+        for n in range(self.cycles):
+            self._cycle(n)
+            if n == warmup_cycles:
+                baseline = tracemalloc.take_snapshot()
+            if n % self.sample_every == 0 or n == self.cycles - 1:
+                self._sample(n)
+        final = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        wall = time.perf_counter() - wall_start
+        self.host.channel.close()
+        os.rmdir(self._channel_dir)
+
+        steady = [sample for sample in self.samples if sample[0] >= warmup_cycles]
+        leaks = []
+        for index, name, tolerance in (
+            (1, "memory", self.MEMORY_TOLERANCE),
+            (2, "widgets", 0),
+            (3, "images", 0)
+        ):
+            if self._keeps_growing([sample[index] for sample in steady], tolerance):
+                leaks.append(name)
+
+        report = [f"{self.cycles} cycles in {wall:.1f}s"]
+        report.append(f"{'cycle':>8} {'memory KiB':>12} {'widgets':>8} {'images':>7}")
+        for cycle, memory, widgets, images in self.samples:
+            report.append(f"{cycle:>8} {memory // 1024:>12} {widgets:>8} {images:>7}")
+        report.append(f"Most wakeups in a minute of sleep: {self.idle_wakeups}")
+        limit = self.IDLE_WAKEUP_LIMIT
+        if self.pet._animations.get("sleep"):
+            limit += 60000 // DeskPet.SLEEP_FRAME_DELAY + 1  # Its slowed frames
+        if self.host.watcher.polling:
+            limit += 1  # The slow idle poll of the data files may fall in that minute
+        idle_ok = self.idle_wakeups <= limit
+        if leaks:
+            report.append(f"FAIL: unbounded growth in {', '.join(leaks)}")
+            if baseline is not None:
+                report.append("Largest allocation growth since warm-up:")
+                for stat in final.compare_to(baseline, "lineno")[:5]:
+                    report.append(f"  {stat}")
+        else:
+            report.append("PASS: memory, widgets and images stayed bounded")
+        if idle_ok and limit:
+            report.append(f"PASS: the sleeping pet stayed within {limit} allowed wakeups a minute")
+        elif idle_ok:
+            report.append("PASS: the sleeping pet did not wake up")
+        else:
+            report.append(f"FAIL: the sleeping pet woke up to {self.idle_wakeups} times a minute")
+        return not leaks and idle_ok, report
+
+
+def run_soak(cycles):
+    """Entry point for --soak; exits non-zero on a leak"""
+    passed, report = SoakTest(cycles).run()
+    print("\n".join(report))
+    sys.exit(0 if passed else 1)
+
+
+def run_replay(source):
+    """Entry point for --replay"""
+    if source == "day":
+        trace = scripted_day_trace()
+    else:
+        with open(source, "r") as f:
+            trace = json.load(f)
+    report = ReplayHarness(trace).run()
+    print(json.dumps(report, indent=2))
+
 
 if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    stdin_text = sys.stdin.read() if args.import_reminders else ""
+
+    if args.replay:
+        run_replay(args.replay)
+        sys.exit(0)
+    if args.soak:
+        run_soak(args.soak)
+
+    # Hand off to an already running pet instead of starting a second one
+    try:
+        if InstanceChannel.forward(sys.argv[1:], stdin_text):
+            sys.exit(0)
+    except OSError as e:
+        # It is running and may have run the command; don't start another
+        print(f"Error talking to running instance: {e}")
+        sys.exit(1)
+
     try:
-        print("Creating pet instance...")
-        pet = DeskPet()
-        print("Running pet...")
-        pet.run()
+        print("Creating pet host...")
+        host = PetHost()
+        host.handle_command(args, stdin_text)
+        print("Running pets...")
+        host.run()
     except Exception as e:
         print(f"Fatal error: {e}")
         input("Press Enter to exit...")